@@ -0,0 +1,363 @@
+"""
+Asynchronous actor-learner self-play on one machine.
+
+Actor processes each step a CTFVecEnv with a snapshot of the policy and write
+fixed-length rollouts into slots of a shared-memory ring. The learner (the
+calling process) copies each finished slot into a PPO rollout buffer, hands
+the slot back and runs a PPO update, so actors keep generating while the
+learner trains. Only slot indices and a few episode stats go through queues.
+
+Weights are broadcast through a shared parameter vector with a version
+counter; actors pick up a new version before each rollout. A rollout's
+staleness is the number of updates the learner made since the snapshot that
+generated it. Rollouts staler than `max_staleness` are dropped. Values are
+recomputed with the learner's critic before computing advantages, and the
+PPO ratio uses the actors' log-probs, so the clipped objective bounds how far
+an update moves from the (slightly older) behavior policy.
+
+    model = PPO("MlpPolicy", CTFVecEnv(16), n_steps=128)
+    with ActorLearner(model, num_actors=8, save_dir="models/team1") as runner:
+        runner.learn(2_000_000)
+"""
+import multiprocessing
+import os
+import queue
+import time
+from types import SimpleNamespace
+import numpy as np
+import torch
+from stable_baselines3.common.utils import configure_logger
+from game import GameConfig
+from vec_env import CTFVecEnv, _as_array, _shared_array
+
+# Actors block on the free-slot queue for at most this long before checking for shutdown
+POLL_SECONDS = 0.1
+
+
+def _make_policy(spec):
+    policy = spec["policy_class"](spec["observation_space"], spec["action_space"], lambda _: 0.0, **spec["policy_kwargs"])
+    policy.set_training_mode(False)
+    return policy
+
+
+def _load_weights(policy, weights, lock):
+    with lock:
+        vector = torch.as_tensor(weights.copy())
+    torch.nn.utils.vector_to_parameters(vector, policy.parameters())
+
+
+def _actor(actor_id, spec, buffers, free_slots, ready, weights, version, lock, stop, seed):
+    torch.set_num_threads(1)
+    torch.manual_seed(int(seed.generate_state(1)[0]))
+
+    num_envs, n_steps = spec["num_envs"], spec["n_steps"]
+    env = CTFVecEnv(num_envs, T=spec["T"], seed=seed, config=spec["config"])
+
+    weights = _as_array(weights, np.float32)
+    policy = _make_policy(spec)
+    _load_weights(policy, weights, lock)
+    policy_version = version.value
+
+    # Self-play against a copy of the policy that is refreshed every `opponent_refresh` versions
+    opponent = None
+    if spec["opponent"] == "self":
+        opponent = _make_policy(spec)
+        opponent.load_state_dict(policy.state_dict())
+        opponent_version = policy_version
+        env.set_opponent_policy("learned", SimpleNamespace(policy=opponent, predict=opponent.predict))
+    else:
+        env.set_opponent_policy(spec["opponent"], None)
+
+    slots = {name: _as_array(buffer, np.float32) for name, buffer in buffers.items()}
+    low, high = spec["action_space"].low, spec["action_space"].high
+
+    obs = env.reset()
+    episode_starts = np.ones(num_envs, dtype=np.float32)
+    episode_steps = np.zeros(num_envs, dtype=np.int64)
+
+    while not stop.is_set():
+        try:
+            slot = free_slots.get(timeout=POLL_SECONDS)
+        except queue.Empty:
+            continue
+
+        if version.value != policy_version:
+            policy_version = version.value
+            _load_weights(policy, weights, lock)
+            if opponent is not None and policy_version - opponent_version >= spec["opponent_refresh"]:
+                opponent.load_state_dict(policy.state_dict())
+                opponent_version = policy_version
+
+        episodes = []
+        for t in range(n_steps):
+            with torch.no_grad():
+                actions, _, log_probs = policy(torch.as_tensor(obs))
+            actions = actions.numpy()
+
+            slots["obs"][slot, t] = obs
+            slots["actions"][slot, t] = actions
+            slots["log_probs"][slot, t] = log_probs.numpy()
+            slots["episode_starts"][slot, t] = episode_starts
+
+            obs, rewards, dones, infos = env.step(np.clip(actions, low, high))
+            slots["rewards"][slot, t] = rewards
+            episode_starts = dones.astype(np.float32)
+
+            episode_steps += 1
+            for i in np.flatnonzero(dones):
+                episodes.append((infos[i]["winner"], int(episode_steps[i])))
+                episode_steps[i] = 0
+
+        slots["last_obs"][slot] = obs
+        slots["last_dones"][slot] = episode_starts
+        ready.put((slot, actor_id, policy_version, episodes))
+
+
+class ActorLearner:
+    """
+    Runs `num_actors` actor processes feeding PPO updates of `model`.
+
+    `model` is a PPO whose env is a CTFVecEnv: every actor steps as many games
+    as that env has, for model.n_steps steps per rollout, so each rollout fills
+    the model's rollout buffer exactly. The env itself is only used for its
+    spaces. Actors play against a copy of the current policy refreshed every
+    `opponent_refresh` updates (opponent="self"), or a "stationary"/"random"
+    opponent.
+
+    The ring has `num_slots` rollouts (two per actor by default), and rollouts
+    more than `max_staleness` updates old (num_slots by default) are dropped.
+    With save_dir, the policy is checkpointed every `save_freq` timesteps and at
+    the end of learn() as team1_<steps>_steps.zip, which league.CheckpointIndex
+    picks up.
+    """
+
+    def __init__(self, model, num_actors=None, T=200, config=None, seed=None, opponent="self", opponent_refresh=10,
+                 max_staleness=None, broadcast_every=1, num_slots=None, save_dir=None, save_freq=100_000, metrics=None,
+                 start_method=None) -> None:
+        if opponent not in ("self", "stationary", "random"):
+            raise ValueError(f"Unknown opponent {opponent!r}, expected 'self', 'stationary' or 'random'.")
+
+        if num_actors is None:
+            # One core stays with the learner
+            num_actors = max(1, os.cpu_count() - 1)
+        if num_slots is None:
+            num_slots = 2 * num_actors
+        if max_staleness is None:
+            # Rollouts queued behind a full ring are this stale, only drop the ones that are older
+            max_staleness = num_slots
+        if config is None:
+            config = GameConfig()
+
+        self.model = model
+        self.num_envs = model.n_envs
+        self.n_steps = model.n_steps
+        self.max_staleness = max_staleness
+        self.broadcast_every = broadcast_every
+        self.save_dir = save_dir
+        self.save_freq = save_freq
+        self.metrics = metrics
+
+        obs_shape = model.observation_space.shape
+        action_dim = model.action_space.shape[0]
+        rollout = (num_slots, self.n_steps, self.num_envs)
+        self.buffers = {
+            "obs": _shared_array("f", rollout + obs_shape),
+            "actions": _shared_array("f", rollout + (action_dim,)),
+            "log_probs": _shared_array("f", rollout),
+            "rewards": _shared_array("f", rollout),
+            "episode_starts": _shared_array("f", rollout),
+            "last_obs": _shared_array("f", (num_slots, self.num_envs) + obs_shape),
+            "last_dones": _shared_array("f", (num_slots, self.num_envs)),
+        }
+        self.slots = {name: _as_array(buffer, np.float32) for name, buffer in self.buffers.items()}
+
+        parameters = torch.nn.utils.parameters_to_vector(model.policy.parameters())
+        self.weights_buffer = _shared_array("f", (parameters.numel(),))
+        self.weights = _as_array(self.weights_buffer, np.float32)
+
+        ctx = multiprocessing.get_context(start_method)
+        self.lock = ctx.Lock()
+        self.version = ctx.Value("q", 0, lock=False)
+        self.stop = ctx.Event()
+        self.free_slots = ctx.Queue()
+        self.ready = ctx.Queue()
+        for slot in range(num_slots):
+            self.free_slots.put(slot)
+
+        self.updates = 0
+        self.broadcast()
+
+        spec = {
+            "policy_class": model.policy_class,
+            "policy_kwargs": dict(model.policy_kwargs, use_sde=model.use_sde),
+            "observation_space": model.observation_space,
+            "action_space": model.action_space,
+            "num_envs": self.num_envs,
+            "n_steps": self.n_steps,
+            "T": T,
+            "config": config,
+            "opponent": opponent,
+            "opponent_refresh": opponent_refresh,
+        }
+        seeds = np.random.SeedSequence(seed).spawn(num_actors)
+
+        self.processes = []
+        for actor_id, actor_seed in enumerate(seeds):
+            args = (actor_id, spec, self.buffers, self.free_slots, self.ready, self.weights_buffer, self.version,
+                    self.lock, self.stop, actor_seed)
+            process = ctx.Process(target=_actor, args=args, daemon=True)
+            process.start()
+            self.processes.append(process)
+
+        self.closed = False
+
+    def broadcast(self):
+        """
+        Publish the learner's current weights as version `updates`.
+        """
+        with torch.no_grad():
+            vector = torch.nn.utils.parameters_to_vector(self.model.policy.parameters()).cpu().numpy()
+
+        with self.lock:
+            np.copyto(self.weights, vector)
+            self.version.value = self.updates
+
+    def _fill_rollout_buffer(self, slot):
+        """
+        Copy a finished slot into the model's rollout buffer and free the slot.
+        """
+        policy = self.model.policy
+        buffer = self.model.rollout_buffer
+        buffer.reset()
+
+        np.copyto(buffer.observations, self.slots["obs"][slot])
+        np.copyto(buffer.actions, self.slots["actions"][slot])
+        np.copyto(buffer.log_probs, self.slots["log_probs"][slot])
+        np.copyto(buffer.rewards, self.slots["rewards"][slot])
+        np.copyto(buffer.episode_starts, self.slots["episode_starts"][slot])
+        last_obs = self.slots["last_obs"][slot].copy()
+        last_dones = self.slots["last_dones"][slot].copy()
+        self.free_slots.put(slot)
+
+        # Bootstrap from the learner's critic rather than the actor's older one
+        policy.set_training_mode(False)
+        with torch.no_grad():
+            observations = torch.as_tensor(buffer.observations.reshape(-1, *buffer.obs_shape), device=policy.device)
+            buffer.values[:] = policy.predict_values(observations).cpu().numpy().reshape(buffer.values.shape)
+            last_values = policy.predict_values(torch.as_tensor(last_obs, device=policy.device))
+
+        buffer.pos = buffer.buffer_size
+        buffer.full = True
+        buffer.compute_returns_and_advantage(last_values=last_values, dones=last_dones)
+
+    def _next_rollout(self):
+        while True:
+            try:
+                return self.ready.get(timeout=1.0)
+            except queue.Empty:
+                dead = [i for i, process in enumerate(self.processes) if not process.is_alive()]
+                if dead:
+                    raise RuntimeError(f"Actor processes {dead} exited unexpectedly")
+
+    def learn(self, total_timesteps, log_interval=1):
+        """
+        Consume rollouts and update the model until it has trained on `total_timesteps` more steps.
+        """
+        model = self.model
+        if not model._custom_logger:
+            model.set_logger(configure_logger(model.verbose, model.tensorboard_log, "AsyncPPO"))
+
+        start_steps = model.num_timesteps
+        target = start_steps + total_timesteps
+        next_save = start_steps + self.save_freq
+        start_time = time.perf_counter()
+
+        staleness, dropped, episodes = [], 0, []
+        while model.num_timesteps < target:
+            slot, actor_id, policy_version, finished = self._next_rollout()
+            episodes.extend(finished)
+
+            lag = self.updates - policy_version
+            if self.metrics is not None:
+                self.metrics.observe("staleness", lag)
+                for winner, length in finished:
+                    self.metrics.record_episode(length, winner)
+
+            if lag > self.max_staleness:
+                self.free_slots.put(slot)
+                dropped += 1
+                if self.metrics is not None:
+                    self.metrics.count("rollouts/dropped")
+                continue
+
+            staleness.append(lag)
+            self._fill_rollout_buffer(slot)
+
+            steps = self.n_steps * self.num_envs
+            model.num_timesteps += steps
+            model._current_progress_remaining = 1.0 - (model.num_timesteps - start_steps) / total_timesteps
+            model.train()
+
+            self.updates += 1
+            if self.updates % self.broadcast_every == 0:
+                self.broadcast()
+
+            if self.metrics is not None:
+                self.metrics.count("rollouts/consumed")
+                self.metrics.step(steps)
+
+            if self.save_dir is not None and model.num_timesteps >= next_save:
+                self.save()
+                next_save += self.save_freq
+
+            if log_interval and self.updates % log_interval == 0:
+                elapsed = time.perf_counter() - start_time
+                model.logger.record("async/staleness", np.mean(staleness))
+                model.logger.record("async/dropped_rollouts", dropped)
+                model.logger.record("async/updates", self.updates)
+                model.logger.record("time/steps_per_sec", (model.num_timesteps - start_steps) / elapsed)
+                if episodes:
+                    winners = np.array([w for w, _ in episodes])
+                    model.logger.record("ctf/win_rate", np.mean(winners == 1))
+                    model.logger.record("ctf/loss_rate", np.mean(winners == 2))
+                    model.logger.record("ctf/draw_rate", np.mean(winners == 0))
+                    model.logger.record("ctf/timeout_rate", np.mean(winners == -1))
+                    model.logger.record("ctf/episode_length", np.mean([length for _, length in episodes]))
+                model.logger.dump(step=model.num_timesteps)
+                staleness, dropped, episodes = [], 0, []
+
+        if self.save_dir is not None:
+            self.save()
+
+        return model
+
+    def save(self):
+        path = os.path.join(self.save_dir, f"team1_{self.model.num_timesteps}_steps.zip")
+        if not os.path.exists(path):
+            self.model.save(path)
+        return path
+
+    def close(self):
+        if self.closed:
+            return
+
+        self.stop.set()
+        # Drain finished rollouts so no actor is blocked writing to the queue
+        for process in self.processes:
+            while process.is_alive():
+                try:
+                    self.ready.get(timeout=POLL_SECONDS)
+                except queue.Empty:
+                    pass
+                process.join(timeout=POLL_SECONDS)
+
+        for q in (self.ready, self.free_slots):
+            q.close()
+            q.join_thread()
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,282 @@
+import time
+import numpy as np
+from metrics import WINNER_NAMES
+from game import GameConfig, interaction_weights, interaction_scores
+import kernels
+
+
+class BatchedGame:
+    """
+    Capture the Flag engine that holds N independent games in contiguous arrays
+    and advances all of them in one vectorized call.
+
+    Players are laid out team 1 first, then team 2, so `pos` is (N, 2 * team_size, 2).
+    `winner` is 1 or 2 for a flag capture, 0 for a draw and -1 for a timeout.
+
+    Steps run on NumPy or, with config.backend "numba" (or "python"), on the
+    fused kernel in kernels.py, with the same results.
+    """
+
+    def __init__(self, num_games, T=200, seed=None, config=None) -> None:
+        if config is None:
+            config = GameConfig()
+        self.config = config
+
+        self.num_games = num_games
+        self.team_size = config.team_size
+        self.num_players = 2 * config.team_size
+
+        self.board_dims = config.board_dims
+        self.team1_bounds = config.team1_bounds
+        self.team2_bounds = config.team2_bounds
+
+        self.interaction_radius = config.interaction_radius
+
+        # Time steps
+        self.T = T # horizon
+
+        self.rng = np.random.default_rng(seed)
+
+        self.player_weight, self.flag_weight = interaction_weights(self.team_size)
+        self.neighbor_index = config.make_neighbor_index()
+        self.backend = kernels.resolve_backend(config.backend, self.neighbor_index)
+
+        # Game state, one row per game
+        self.pos = np.zeros((num_games, self.num_players, 2))
+        self.active = np.ones((num_games, self.num_players), dtype=bool)
+        self.flags = np.zeros((num_games, 2, 2))
+        self.actions = np.zeros((num_games, self.num_players))
+        self.t = np.zeros(num_games, dtype=np.int64)
+        self.rewards = np.zeros((num_games, 2))
+        self.done = np.zeros(num_games, dtype=bool)
+        self.winner = np.zeros(num_games, dtype=np.int64)
+
+        # Player positions after moving (before captures) from the last step, or the reset positions
+        self.moved = np.zeros_like(self.pos)
+
+        if self.backend != "numpy":
+            # Per game capture counts from the kernel, and a stand-in for a stationary team's actions
+            self.events = np.zeros((num_games, 4), dtype=np.int64)
+            self._still = np.zeros((num_games, self.team_size))
+
+        # metrics.Metrics, None to disable
+        self.metrics = None
+
+    def reset(self, mask=None, start=None):
+        """
+        Reset the games selected by the boolean `mask` (all games if None).
+
+        Start positions are uniform in the team bounds, or copied from `start` =
+        (pos, active, flags) with one row per reset game, e.g. from
+        scenarios.ScenarioBank.draw.
+        """
+        if mask is None:
+            mask = np.ones(self.num_games, dtype=bool)
+
+        idx = np.flatnonzero(mask)
+        n, k = self.team_size, len(idx)
+
+        if start is None:
+            self.pos[idx, :n] = self.rng.uniform(self.team1_bounds[0], self.team1_bounds[1], (k, n, 2))
+            self.pos[idx, n:] = self.rng.uniform(self.team2_bounds[0], self.team2_bounds[1], (k, n, 2))
+            self.flags[idx, 0] = self.rng.uniform(self.team1_bounds[0], self.team1_bounds[1], (k, 2))
+            self.flags[idx, 1] = self.rng.uniform(self.team2_bounds[0], self.team2_bounds[1], (k, 2))
+            self.active[idx] = True
+        else:
+            self.pos[idx], self.active[idx], self.flags[idx] = start
+
+        self.actions[idx] = 0.0
+        self.t[idx] = 0
+        self.rewards[idx] = 0.0
+        self.done[idx] = False
+        self.winner[idx] = 0
+        self.moved[idx] = self.pos[idx]
+
+        return self.team_pos(1), self.team_pos(2)
+
+    def team_pos(self, team):
+        """
+        (N, team_size + 1, 2) positions of a team's players followed by its flag,
+        the batched equivalent of Team.get_pos.
+        """
+        n = self.team_size
+        players = self.pos[:, :n] if team == 1 else self.pos[:, n:]
+
+        return np.concatenate((players, self.flags[:, team - 1, None]), axis=1)
+
+    def _apply_actions(self, team1_action, team2_action, running):
+        n = self.team_size
+
+        for team_slice, action in ((slice(0, n), team1_action), (slice(n, 2 * n), team2_action)):
+            if action is None:
+                continue
+
+            moving = self.active[:, team_slice] & running[:, None]
+            pos = self.pos[:, team_slice]
+
+            pos[..., 0] += np.where(moving, np.cos(action), 0.0)
+            pos[..., 1] += np.where(moving, np.sin(action), 0.0)
+            np.clip(pos, a_min=np.zeros_like(self.board_dims), a_max=self.board_dims, out=pos)
+
+            self.actions[:, team_slice] = np.where(moving, action, self.actions[:, team_slice])
+
+    def _check_distances(self, running):
+        n = self.team_size
+
+        team1_out = ~self.active[:, :n].any(axis=1)
+        team2_out = ~self.active[:, n:].any(axis=1)
+        all_out = running & team1_out & team2_out
+
+        scoring = running & ~all_out
+
+        flag_score, player_score = interaction_scores(
+            self.pos, self.flags, self.player_weight, self.flag_weight, self.interaction_radius, self.neighbor_index
+        )
+
+        flag1_cap = scoring & (flag_score[:, 0] < 0)
+        flag2_cap = scoring & (flag_score[:, 1] < 0)
+        flag_done = flag1_cap | flag2_cap
+        draw = flag1_cap & flag2_cap
+
+        # Flag captures end the game
+        team1_win = flag2_cap & ~draw
+        team2_win = flag1_cap & ~draw
+
+        self.rewards[team1_win] += [10, -10]
+        self.rewards[team2_win] += [-10, 10]
+        self.rewards[draw] -= 20
+
+        self.winner[team1_win] = 1
+        self.winner[team2_win] = 2
+        self.winner[draw | all_out] = 0
+
+        # Otherwise remove captured players
+        removing = scoring & ~flag_done
+        captured = (player_score < 0) & removing[:, None]
+
+        t1_captured = captured[:, :n].sum(axis=1)
+        t2_captured = captured[:, n:].sum(axis=1)
+
+        self.rewards[removing, 0] += (3 * t2_captured - 3 * t1_captured)[removing]
+        self.rewards[removing, 1] += (3 * t1_captured - 3 * t2_captured)[removing]
+
+        self.active[captured] = False
+        self.pos[captured] = 0.0
+
+        if self.metrics is not None:
+            self.metrics.count("flag_captures/team1", int(flag2_cap.sum()))
+            self.metrics.count("flag_captures/team2", int(flag1_cap.sum()))
+            self.metrics.count("captures/team1", int(t2_captured.sum()))
+            self.metrics.count("captures/team2", int(t1_captured.sum()))
+
+        self.done |= flag_done | all_out
+
+    # Move one unit step in the direction specified
+    def step(self, team1_action, team2_action):
+        """
+        Advance every unfinished game by one step.
+
+        Actions are (N, team_size) angles in radians, or None for a stationary team.
+        Finished games are left untouched until they are reset.
+
+        Returns done, the team 1 and team 2 player positions after moving (before
+        captured players are removed, as in Game.step), and both teams' rewards.
+        """
+        self._advance(team1_action, team2_action, ~self.done)
+
+        n = self.team_size
+        return self.done.copy(), self.moved[:, :n].copy(), self.moved[:, n:].copy(), self.rewards[:, 0].copy(), self.rewards[:, 1].copy()
+
+    def step_repeat(self, team1_action, team2_action, repeat, stop_on_capture=True):
+        """
+        Action repeat: advance every unfinished game by up to `repeat` steps with
+        the same actions, as Game.step_repeat does for one game.
+
+        A game stops repeating once it ends or, with stop_on_capture, once one
+        of its players is captured; the others carry on. Returns the same as
+        step, with rewards summed over each game's steps, plus the number of
+        steps each game took.
+        """
+        deciding = ~self.done
+        rewards = np.zeros_like(self.rewards)
+        steps = np.zeros(self.num_games, dtype=np.int64)
+        num_active = self.active.sum(axis=1)
+
+        for _ in range(repeat):
+            self._advance(team1_action, team2_action, deciding)
+            rewards[deciding] += self.rewards[deciding]
+            steps += deciding
+
+            deciding &= ~self.done
+            if stop_on_capture:
+                deciding &= self.active.sum(axis=1) == num_active
+            if not deciding.any():
+                break
+
+        self.rewards[:] = rewards
+
+        n = self.team_size
+        return (self.done.copy(), self.moved[:, :n].copy(), self.moved[:, n:].copy(), self.rewards[:, 0].copy(),
+                self.rewards[:, 1].copy(), steps)
+
+    def _advance(self, team1_action, team2_action, running):
+        # One step of the games in `running`, the others keep their state and get zero rewards
+        if self.metrics is not None:
+            start = time.perf_counter()
+
+        if self.backend != "numpy":
+            self._advance_kernel(team1_action, team2_action, running)
+        else:
+            self.rewards[running] = -0.1
+            self.rewards[~running] = 0.0
+
+            self._apply_actions(team1_action, team2_action, running)
+
+            self.moved[running] = self.pos[running]
+
+            self._check_distances(running)
+
+            self.t[running] += 1
+
+            timeout = running & (self.t >= self.T)
+            self.done |= timeout
+            self.winner[timeout] = -1
+
+        if self.metrics is not None:
+            self._record_step(running, time.perf_counter() - start)
+
+    def _advance_kernel(self, team1_action, team2_action, running):
+        # cos/sin stay in NumPy so float32 angles round as in _apply_actions
+        teams = []
+        for action in (team1_action, team2_action):
+            if action is None:
+                teams += [False, self._still, self._still, self._still]
+            else:
+                action = np.asarray(action)
+                teams += [True, action, np.cos(action), np.sin(action)]
+
+        kernel = kernels.advance_games if self.backend == "numba" else kernels.advance_games_python
+        kernel(
+            self.pos, self.active, self.flags, self.actions, self.moved, self.t, self.rewards, self.done,
+            self.winner, running, *teams, float(self.board_dims[0]), float(self.board_dims[1]),
+            self.player_weight, self.flag_weight, float(self.interaction_radius), self.T, self.events,
+        )
+
+        if self.metrics is not None:
+            counts = self.events.sum(axis=0)
+            self.metrics.count("flag_captures/team1", int(counts[kernels.FLAG_CAPTURES_TEAM1]))
+            self.metrics.count("flag_captures/team2", int(counts[kernels.FLAG_CAPTURES_TEAM2]))
+            self.metrics.count("captures/team1", int(counts[kernels.CAPTURES_TEAM1]))
+            self.metrics.count("captures/team2", int(counts[kernels.CAPTURES_TEAM2]))
+
+    def _record_step(self, running, latency):
+        # Latency is per batched call, steps count every running game
+        self.metrics.observe("step_latency", latency)
+
+        finished = running & self.done
+        if finished.any():
+            self.metrics.observe_many("episode_length", self.t[finished])
+            for code, count in zip(*np.unique(self.winner[finished], return_counts=True)):
+                self.metrics.count(f"winner/{WINNER_NAMES[int(code)]}", int(count))
+
+        self.metrics.step(int(running.sum()))
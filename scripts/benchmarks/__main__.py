@@ -0,0 +1,250 @@
+"""
+Baseline timings for the simulator hot paths.
+
+Measures Game.step, Game.reset, CTFEnv.step, CTFEnv._get_opponent_action with a
+learned opponent, Game.render (offscreen) and end-to-end PPO training steps/sec.
+Each call is timed on its own and reported as latency percentiles, along with
+the peak traced allocation over a shorter pass and the process max RSS.
+Results are written as JSON so runs can be compared.
+
+Run from the scripts directory:
+    python -m benchmarks --out ../benchmarks/baseline.json
+    python -m benchmarks --only game_step ctf_env_step --profile ../profiles
+    python -m benchmarks --model models/team1/team1_450000_steps.zip
+    python -m benchmarks --model models/team1/team1_450000_steps.policy
+
+With --profile every benchmark is also run under cProfile; the .prof files
+load in pstats, snakeviz or any tool that reads cProfile output.
+"""
+import argparse
+import cProfile
+import json
+import os
+import platform
+import pstats
+import resource
+import sys
+import time
+import tracemalloc
+import numpy as np
+from game import Game, GameConfig
+from gym_env import CTFEnv
+
+SPRITES = ["../images/team1.png", "../images/team2.png"]
+FLAGS = ["../images/flag1.png", "../images/flag2.png"]
+
+
+def game_step(args, config):
+    game = Game(SPRITES, FLAGS, T=args.T, config=config)
+    game.reset(seed=0)
+    n = config.team_size
+
+    def call():
+        if game.step(game.rng.uniform(0, 2 * np.pi, n), game.rng.uniform(0, 2 * np.pi, n))[0]:
+            game.reset()
+
+    return call
+
+
+def game_reset(args, config):
+    game = Game(SPRITES, FLAGS, T=args.T, config=config)
+    game.reset(seed=0)
+    return game.reset
+
+
+def _env(args, config, opponent="random", model=None):
+    env = CTFEnv(SPRITES, FLAGS, T=args.T, render_mode=None, config=config)
+    env.set_opponent_policy(opponent, model)
+    env.reset(seed=0)
+    return env
+
+
+def ctf_env_step(args, config):
+    env = _env(args, config)
+
+    def call():
+        if env.step(env.action_space.sample())[2]:
+            env.reset()
+
+    return call
+
+
+def opponent_action(args, config):
+    if args.model:
+        from league import PolicyCache
+        model = PolicyCache().load(args.model)
+    else:
+        # Untrained policy of the default architecture, inference cost is the same
+        from stable_baselines3 import PPO
+        model = PPO("MlpPolicy", _env(args, config), device="cpu")
+
+    env = _env(args, config, "learned", model)
+    return env._get_opponent_action
+
+
+def game_render(args, config):
+    # No window needed, offscreen rendering draws the same frame
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+    game = Game(SPRITES, FLAGS, T=args.T, config=config)
+    game.reset(seed=0)
+    game.attach_renderer(offscreen=True)
+    return game.render
+
+
+BENCHMARKS = {
+    "game_step": game_step,
+    "game_reset": game_reset,
+    "ctf_env_step": ctf_env_step,
+    "opponent_action": opponent_action,
+    "game_render": game_render,
+}
+
+
+def time_calls(call, calls, warmup=100):
+    """
+    Per-call wall time in seconds.
+    """
+    for _ in range(warmup):
+        call()
+
+    latencies = np.empty(calls)
+    clock = time.perf_counter
+    for i in range(calls):
+        start = clock()
+        call()
+        latencies[i] = clock() - start
+
+    return latencies
+
+
+def peak_allocation(call, calls):
+    """
+    Peak bytes traced by tracemalloc over `calls` calls, above the starting level.
+    """
+    call()
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    for _ in range(calls):
+        call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return peak - base
+
+
+def profile(name, call, calls, profile_dir, top=15):
+    os.makedirs(profile_dir, exist_ok=True)
+    path = os.path.join(profile_dir, f"{name}.prof")
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    for _ in range(calls):
+        call()
+    profiler.disable()
+    profiler.dump_stats(path)
+
+    print(f"\n--- {name} ({path}) ---")
+    pstats.Stats(profiler).sort_stats("cumulative").print_stats(top)
+    return path
+
+
+def summarize(latencies):
+    p50, p90, p99 = np.percentile(latencies, (50, 90, 99))
+    return {
+        "calls": len(latencies),
+        "calls_per_sec": len(latencies) / latencies.sum(),
+        "mean_us": latencies.mean() * 1e6,
+        "p50_us": p50 * 1e6,
+        "p90_us": p90 * 1e6,
+        "p99_us": p99 * 1e6,
+        "max_us": latencies.max() * 1e6,
+    }
+
+
+def ppo_train(args, config):
+    """
+    End-to-end PPO steps/sec over `args.ppo_steps` steps on `args.n_envs` CTFEnvs.
+    """
+    from stable_baselines3 import PPO
+    from stable_baselines3.common.env_util import make_vec_env
+    from callbacks import ThroughputCallback
+
+    env = make_vec_env(
+        CTFEnv, n_envs=args.n_envs, seed=0,
+        env_kwargs=dict(team_sprite_path=SPRITES, team_flag_path=FLAGS, T=args.T, render_mode=None, config=config),
+    )
+    model = PPO("MlpPolicy", env, n_steps=max(2048 // args.n_envs, 64), device="cpu", seed=0, verbose=0)
+
+    throughput = ThroughputCallback()
+    model.learn(total_timesteps=args.ppo_steps, callback=throughput)
+    env.close()
+
+    return {"steps": args.ppo_steps, "n_envs": args.n_envs, "steps_per_sec": throughput.steps_per_sec}
+
+
+def main():
+    names = list(BENCHMARKS) + ["ppo_train"]
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", choices=names, default=names)
+    parser.add_argument("--calls", type=int, default=5000, help="Timed calls per benchmark")
+    parser.add_argument("--memory-calls", type=int, default=500, help="Calls traced for peak allocation")
+    parser.add_argument("--team-size", type=int, default=3)
+    parser.add_argument("--board", type=int, default=30)
+    parser.add_argument("--T", type=int, default=200)
+    parser.add_argument("--model", help="Checkpoint or exported .policy for the learned opponent (an untrained policy if omitted)")
+    parser.add_argument("--ppo-steps", type=int, default=20480)
+    parser.add_argument("--n-envs", type=int, default=8)
+    parser.add_argument("--profile", metavar="DIR", help="Also run each benchmark under cProfile, writing DIR/<name>.prof")
+    parser.add_argument("--out", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    config = GameConfig(team_size=args.team_size, board_dims=(args.board, args.board))
+
+    results = {}
+    print(f"{'benchmark':<16} {'calls/s':>10} {'p50 us':>9} {'p90 us':>9} {'p99 us':>9} {'peak KB':>9}")
+    for name in args.only:
+        if name == "ppo_train":
+            continue
+
+        call = BENCHMARKS[name](args, config)
+        result = summarize(time_calls(call, args.calls))
+        result["peak_kb"] = peak_allocation(call, args.memory_calls) / 2**10
+        if args.profile:
+            result["profile"] = profile(name, call, args.calls, args.profile)
+
+        results[name] = result
+        print(f"{name:<16} {result['calls_per_sec']:>10.0f} {result['p50_us']:>9.1f} {result['p90_us']:>9.1f} "
+              f"{result['p99_us']:>9.1f} {result['peak_kb']:>9.1f}")
+
+    if "ppo_train" in args.only:
+        if args.profile:
+            os.makedirs(args.profile, exist_ok=True)
+            profiler = cProfile.Profile()
+            results["ppo_train"] = profiler.runcall(ppo_train, args, config)
+            results["ppo_train"]["profile"] = os.path.join(args.profile, "ppo_train.prof")
+            profiler.dump_stats(results["ppo_train"]["profile"])
+        else:
+            results["ppo_train"] = ppo_train(args, config)
+        print(f"{'ppo_train':<16} {results['ppo_train']['steps_per_sec']:>10.0f} steps/s")
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "config": {"team_size": args.team_size, "board": args.board, "T": args.T},
+        # ru_maxrss is in KB on Linux
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10,
+        "results": results,
+    }
+
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
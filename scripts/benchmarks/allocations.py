@@ -0,0 +1,103 @@
+"""
+Check that the in-place step path allocates no arrays in steady state.
+
+Runs Game.step_inplace and CTFEnv.step (copy_obs=False, stationary opponent)
+under tracemalloc after a warmup and reports, per team size:
+    growth - traced memory still held after the steps (should be ~0)
+    peak   - largest transient allocation above the starting level
+
+With no per-step arrays the peak is only Python call overhead, so it stays the
+same as the team (and every array in the step) grows. The check fails, with
+exit status 1, if memory grows or the peak grows with team size; CI runs it
+through benchmarks/checks.py. Game.step, which returns fresh copies,
+is shown for comparison.
+
+Run from the scripts directory:
+    python -m benchmarks.allocations --team-sizes 3 10 30 --steps 5000
+"""
+import argparse
+import sys
+import tracemalloc
+import numpy as np
+from game import Game, GameConfig
+from gym_env import CTFEnv
+
+SPRITES = ["../images/team1.png", "../images/team2.png"]
+FLAGS = ["../images/flag1.png", "../images/flag2.png"]
+
+# Slack for Python-level objects (ints, floats, views) that come and go per step
+TOLERANCE_BYTES = 512
+
+
+def traced(call, steps, warmup=100):
+    """
+    (growth, peak) bytes traced over `steps` calls after `warmup` traced calls.
+    """
+    tracemalloc.start()
+    for _ in range(warmup):
+        call()
+
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    for _ in range(steps):
+        call()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return current - base, peak - base
+
+
+def step_paths(team_size):
+    # Never-ending games on a large board, so every player stays active and moving
+    config = GameConfig(team_size=team_size, board_dims=(1000, 1000), neighbor_index="brute")
+    action = np.zeros(team_size)
+
+    game = Game(SPRITES, FLAGS, T=np.inf, config=config)
+    game.reset(seed=0)
+
+    env = CTFEnv(SPRITES, FLAGS, T=np.inf, render_mode=None, config=config, copy_obs=False)
+    env.reset(seed=0)
+    env_action = np.zeros(team_size, dtype=np.float32)
+
+    copying = Game(SPRITES, FLAGS, T=np.inf, config=config)
+    copying.reset(seed=0)
+
+    return {
+        "Game.step_inplace": lambda: game.step_inplace(action, action),
+        "CTFEnv.step": lambda: env.step(env_action),
+        "Game.step (copies)": lambda: copying.step(action, action),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--team-sizes", type=int, nargs="+", default=[3, 10, 30])
+    parser.add_argument("--steps", type=int, default=5000)
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'path':<20} {'team':>5} {'growth B':>9} {'peak B':>9}")
+    for team_size in args.team_sizes:
+        for name, call in step_paths(team_size).items():
+            growth, peak = traced(call, args.steps)
+            results.setdefault(name, []).append((growth, peak))
+            print(f"{name:<20} {team_size:>5} {growth:>9} {peak:>9}")
+
+    failed = False
+    for name in ("Game.step_inplace", "CTFEnv.step"):
+        growth = max(g for g, _ in results[name])
+        peaks = [p for _, p in results[name]]
+        if growth > TOLERANCE_BYTES:
+            print(f"FAIL {name}: {growth} B still allocated after {args.steps} steps")
+            failed = True
+        if max(peaks) - min(peaks) > TOLERANCE_BYTES:
+            print(f"FAIL {name}: peak allocation grows with team size {peaks}")
+            failed = True
+
+    if failed:
+        sys.exit(1)
+    print("OK: no per-step array allocations")
+
+
+if __name__ == "__main__":
+    main()
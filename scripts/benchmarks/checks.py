@@ -0,0 +1,46 @@
+"""
+Run the regression checks, for CI.
+
+Each check is a module in this package that exits non-zero on failure:
+    allocations   - the in-place step path allocates no arrays per step
+    video_errors  - VideoWriter.close() returns and re-raises encoder errors
+    kernel_parity - the fused step kernel matches the NumPy engine and Game,
+                    compiled if numba is installed and as plain Python if not
+
+Runs them one after another in subprocesses, prints their output and exits
+with status 1 if any failed.
+
+Run from the scripts directory:
+    python -m benchmarks.checks
+    python -m benchmarks.checks --only allocations
+"""
+import argparse
+import subprocess
+import sys
+
+CHECKS = {
+    "allocations": ["--steps", "2000"],
+    "video_errors": [],
+    "kernel_parity": ["--parity-games", "32", "--parity-steps", "150", "--no-timing"],
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", choices=list(CHECKS), default=list(CHECKS))
+    args = parser.parse_args()
+
+    failed = []
+    for name in args.only:
+        print(f"--- {name}", flush=True)
+        if subprocess.run([sys.executable, "-m", f"benchmarks.{name}", *CHECKS[name]]).returncode != 0:
+            failed.append(name)
+
+    if failed:
+        print(f"FAILED: {', '.join(failed)}")
+        sys.exit(1)
+    print(f"All {len(args.only)} checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Check the compiled step kernel against the NumPy engines, and time it.
+
+Steps a BatchedGame on the kernel backend, one on the NumPy backend and one
+reference Game per batched game in lockstep, with random float32 angles (as
+CTFVecEnv produces) and a stationary team every few steps. Teams start
+squeezed towards the midline so captures, flag captures and draws all
+happen. Every step the positions after moving, rewards, done, winner and the
+active mask must match exactly; the check fails, with exit status 1, on any
+difference. The kernel is the compiled one when numba is installed and the
+uncompiled "python" backend otherwise, which runs the same code.
+
+With numba, also times steps/sec of both backends at each batch size, after
+a warmup that includes compiling the kernel (cached on disk after the first
+run). CI runs the parity part through benchmarks/checks.py.
+
+Run from the scripts directory:
+    python -m benchmarks.kernel_parity --team-sizes 3 10 --num-games 64 1024
+    python -m benchmarks.kernel_parity --backend python --no-timing
+"""
+import argparse
+import sys
+import time
+import numpy as np
+import kernels
+from game import Game, GameConfig
+from batched_game import BatchedGame
+
+SPRITES = ["../images/team1.png", "../images/team2.png"]
+FLAGS = ["../images/flag1.png", "../images/flag2.png"]
+
+
+def make_config(team_size, backend):
+    return GameConfig(team_size=team_size, neighbor_index="brute", backend=backend)
+
+
+def random_angles(rng, shape):
+    return (rng.uniform(-1, 1, shape).astype(np.float32) + 1) * np.pi
+
+
+def check_parity(backend, team_size, num_games, steps, T, seed=0):
+    """
+    Number of (step, game) mismatches between the kernel, the NumPy engine and Game.
+    """
+    n = team_size
+    fused = BatchedGame(num_games, T=T, seed=seed, config=make_config(n, backend))
+    vectorized = BatchedGame(num_games, T=T, seed=seed, config=make_config(n, "numpy"))
+    games = [Game(SPRITES, FLAGS, T=T, config=make_config(n, "numpy")) for _ in range(num_games)]
+
+    fused.reset()
+    # Squeeze the teams together so they interact within a few steps
+    fused.pos[:, :n, 1] += fused.board_dims[1] / 4
+    fused.pos[:, n:, 1] -= fused.board_dims[1] / 4
+    vectorized.reset(start=(fused.pos, fused.active, fused.flags))
+    for i, game in enumerate(games):
+        game.reset(start=(fused.pos[i], fused.active[i], fused.flags[i]))
+
+    rng = np.random.default_rng(seed)
+    mismatches = 0
+    for step in range(steps):
+        a1 = random_angles(rng, (num_games, n))
+        a2 = None if step % 7 == 3 else random_angles(rng, (num_games, n))
+
+        running = ~fused.done
+        expected = vectorized.step(a1, a2)
+        result = fused.step(a1, a2)
+
+        same = np.ones(num_games, dtype=bool)
+        for got, want in zip(result, expected):
+            same &= (got == want).reshape(num_games, -1).all(axis=1)
+        same &= (fused.active == vectorized.active).all(axis=1) & (fused.winner == vectorized.winner)
+
+        for i in np.flatnonzero(running):
+            done, p1, p2, _, _, r1, r2 = games[i].step(a1[i], None if a2 is None else a2[i])
+            same[i] &= (done == result[0][i] and np.array_equal(p1, result[1][i]) and np.array_equal(p2, result[2][i])
+                        and r1 == result[3][i] and r2 == result[4][i])
+            same[i] &= np.array_equal(games[i]._active > 0, fused.active[i])
+            if done:
+                same[i] &= (games[i].winner or 0) == fused.winner[i]
+
+        mismatches += int((~same).sum())
+
+    winners = np.bincount(fused.winner[fused.done] + 1, minlength=4)
+    print(f"{backend} team {n:>3}: {mismatches} mismatches over {steps} steps of {num_games} games, "
+          f"{int(fused.done.sum())} finished (timeout {winners[0]}, draw {winners[1]}, team1 {winners[2]}, team2 {winners[3]})")
+    return mismatches
+
+
+def steps_per_sec(backend, team_size, num_games, steps, T):
+    game = BatchedGame(num_games, T=T, seed=0, config=make_config(team_size, backend))
+    game.reset()
+    shape = (num_games, team_size)
+    rng = np.random.default_rng(0)
+    actions = [(random_angles(rng, shape), random_angles(rng, shape)) for _ in range(16)]
+
+    def run(count):
+        for i in range(count):
+            done = game.step(*actions[i % len(actions)])[0]
+            if done.any():
+                game.reset(done)
+
+    run(20)
+    start = time.perf_counter()
+    run(steps)
+    return steps * num_games / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--team-sizes", type=int, nargs="+", default=[3, 10])
+    parser.add_argument("--num-games", type=int, nargs="+", default=[1, 64, 1024])
+    parser.add_argument("--parity-games", type=int, default=64)
+    parser.add_argument("--parity-steps", type=int, default=200)
+    parser.add_argument("--steps", type=int, default=500, help="Timed steps per configuration")
+    parser.add_argument("--T", type=int, default=200)
+    parser.add_argument("--backend", choices=["numba", "python"], default="numba" if kernels.HAVE_NUMBA else "python",
+                        help="Kernel to check, compiled or uncompiled (default: numba if installed)")
+    parser.add_argument("--no-timing", action="store_true", help="Only check parity")
+    args = parser.parse_args()
+
+    mismatches = sum(check_parity(args.backend, n, args.parity_games, args.parity_steps, args.T) for n in args.team_sizes)
+    if mismatches:
+        print(f"FAIL: the {args.backend} kernel differs from the NumPy engine")
+    else:
+        print(f"OK: the {args.backend} kernel matches the NumPy engine and Game")
+
+    if args.no_timing or not kernels.HAVE_NUMBA:
+        if not args.no_timing:
+            print("numba is not installed, skipping the timings")
+        sys.exit(1 if mismatches else 0)
+
+    print(f"\n{'team':>5} {'games':>6} {'numpy steps/s':>14} {'numba steps/s':>14} {'speedup':>8}")
+    for n in args.team_sizes:
+        for num_games in args.num_games:
+            base = steps_per_sec("numpy", n, num_games, args.steps, args.T)
+            fused = steps_per_sec("numba", n, num_games, args.steps, args.T)
+            print(f"{n:>5} {num_games:>6} {base:>14.0f} {fused:>14.0f} {fused / base:>7.1f}x")
+
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Brute-force distance matrix vs. UniformGrid for player-player interactions.
+
+Times interaction_scores with both neighbor indexes while players random-walk
+one unit per step, and reports the smallest player count where the grid wins.
+The crossover depends on how many interaction radii the board spans, which is
+what GRID_MIN_PLAYERS and GRID_MIN_CELLS in game.py are set from.
+
+Run from the scripts directory:
+    python -m benchmarks.neighbors --players 6 20 60 100 200 --boards 30 100 300
+    python -m benchmarks.neighbors --boards 30 --radius 1
+"""
+import argparse
+import json
+import time
+import numpy as np
+from game import interaction_weights, interaction_scores
+from spatial_index import UniformGrid
+
+
+def time_scores(num_players, board, num_games, steps, use_grid, radius=5.0):
+    rng = np.random.default_rng(0)
+    player_weight, flag_weight = interaction_weights(num_players // 2)
+    grid = UniformGrid((board, board), radius) if use_grid else None
+
+    pos = rng.uniform(0, board, (num_games, num_players, 2))
+    flags = rng.uniform(0, board, (num_games, 2, 2))
+
+    elapsed = 0.0
+    for _ in range(steps):
+        angle = rng.uniform(0, 2 * np.pi, (num_games, num_players))
+        pos[..., 0] += np.cos(angle)
+        pos[..., 1] += np.sin(angle)
+        np.clip(pos, 0, board, out=pos)
+
+        start = time.perf_counter()
+        interaction_scores(pos, flags, player_weight, flag_weight, radius, grid)
+        elapsed += time.perf_counter() - start
+
+    return elapsed / steps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, nargs="+", default=[6, 20, 40, 60, 80, 100, 200, 400])
+    parser.add_argument("--boards", type=int, nargs="+", default=[30, 100, 300, 1000])
+    parser.add_argument("--radius", type=float, default=5.0)
+    parser.add_argument("--num-games", type=int, default=1)
+    parser.add_argument("--steps", type=int, default=50)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'board':>6} {'players':>8} {'brute us':>10} {'grid us':>10} {'speedup':>8}")
+    for board in args.boards:
+        crossover = None
+        for num_players in args.players:
+            brute = time_scores(num_players, board, args.num_games, args.steps, use_grid=False, radius=args.radius)
+            grid = time_scores(num_players, board, args.num_games, args.steps, use_grid=True, radius=args.radius)
+            if crossover is None and grid < brute:
+                crossover = num_players
+
+            results.append({"board": board, "radius": args.radius, "players": num_players, "brute_s": brute, "grid_s": grid})
+            print(f"{board:>6} {num_players:>8} {brute * 1e6:>10.1f} {grid * 1e6:>10.1f} {brute / grid:>8.2f}")
+
+        print(f"board {board} ({board / args.radius:.0f} radii across): grid faster from {crossover} players\n")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
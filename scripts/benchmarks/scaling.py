@@ -0,0 +1,107 @@
+"""
+Steps/sec and memory of the simulator as team size and board size grow.
+
+Run from the scripts directory:
+    python -m benchmarks.scaling --team-sizes 3 10 50 100 --boards 30 100 1000
+"""
+import argparse
+import json
+import time
+import tracemalloc
+import numpy as np
+from game import Game, GameConfig
+from batched_game import BatchedGame
+
+SPRITES = ["../images/team1.png", "../images/team2.png"]
+FLAGS = ["../images/flag1.png", "../images/flag2.png"]
+
+
+def make_config(team_size, board):
+    return GameConfig(team_size=team_size, board_dims=(board, board))
+
+
+def run_game(config, T):
+    """
+    Single-game reference engine, as a call that advances it one step.
+    """
+    game = Game(SPRITES, FLAGS, T=T, config=config)
+    rng = np.random.default_rng(0)
+    game.reset()
+
+    def call():
+        if game.step(rng.uniform(0, 2 * np.pi, config.team_size), rng.uniform(0, 2 * np.pi, config.team_size))[0]:
+            game.reset()
+
+    return call
+
+
+def run_batched(config, T, num_games):
+    """
+    Batched engine, as a call that advances every game one step.
+    """
+    game = BatchedGame(num_games, T=T, seed=0, config=config)
+    game.reset()
+    shape = (num_games, config.team_size)
+
+    def call():
+        done = game.step(game.rng.uniform(0, 2 * np.pi, shape), game.rng.uniform(0, 2 * np.pi, shape))[0]
+        if done.any():
+            game.reset(done)
+
+    return call
+
+
+def measure(make_call, steps, memory_steps, games_per_step=1):
+    """
+    Steps/sec over `steps` untraced calls, and the peak traced memory of
+    building the engine and running `memory_steps` calls in a separate pass,
+    so tracing overhead stays out of the timing.
+    """
+    call = make_call()
+    start = time.perf_counter()
+    for _ in range(steps):
+        call()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    call = make_call()
+    for _ in range(memory_steps):
+        call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"steps_per_sec": steps * games_per_step / elapsed, "peak_mb": peak / 2**20}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--team-sizes", type=int, nargs="+", default=[3, 10, 25, 50, 100])
+    parser.add_argument("--boards", type=int, nargs="+", default=[30, 100, 300, 1000])
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--memory-steps", type=int, default=50, help="Steps traced for peak memory, after the timed run")
+    parser.add_argument("--num-games", type=int, default=64)
+    parser.add_argument("--T", type=int, default=200)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'team':>5} {'board':>6} {'engine':>8} {'steps/s':>12} {'peak MB':>9}")
+    for team_size in args.team_sizes:
+        for board in args.boards:
+            config = make_config(team_size, board)
+            for engine, result in (
+                ("game", measure(lambda: run_game(config, args.T), args.steps, args.memory_steps)),
+                ("batched", measure(lambda: run_batched(config, args.T, args.num_games), args.steps, args.memory_steps,
+                                    args.num_games)),
+            ):
+                result.update(team_size=team_size, board=board, engine=engine)
+                results.append(result)
+                print(f"{team_size:>5} {board:>6} {engine:>8} {result['steps_per_sec']:>12.0f} {result['peak_mb']:>9.2f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Check that VideoWriter.close() returns and re-raises encoder errors.
+
+Writes a few frames and closes, each in a thread with a timeout, for:
+    invalid_path   - an output path in a missing directory, with whichever
+                     encoder is installed. With one frame ffmpeg only fails
+                     when the file is finished, after close()'s sentinel was
+                     consumed; with many it fails on a write
+    close_fails    - an encoder whose close raises, so the sentinel-consumed
+                     path is covered even where ffmpeg is not installed
+    open_fails     - an encoder that cannot be opened
+
+Each case passes if close() raises the encoder's error within the timeout.
+Exits non-zero if any case hangs or swallows the error.
+
+Run from the scripts directory:
+    python -m benchmarks.video_errors
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import numpy as np
+from video import VideoWriter
+
+
+class FailingCloseWriter(VideoWriter):
+    def _open_cv2(self, width, height):
+        def close():
+            raise RuntimeError("encoder failed while finishing the file")
+
+        return (lambda frame: None), close
+
+    def _open_ffmpeg(self, ffmpeg, width, height):
+        return self._open_cv2(width, height)
+
+
+class FailingOpenWriter(VideoWriter):
+    def _open_cv2(self, width, height):
+        raise RuntimeError("encoder could not be opened")
+
+    def _open_ffmpeg(self, ffmpeg, width, height):
+        return self._open_cv2(width, height)
+
+
+def run_case(writer, frames, timeout):
+    """
+    ("ok" | "hang" | "no error", message) for writing `frames` frames and closing.
+    """
+    outcome = {}
+
+    def target():
+        try:
+            frame = np.zeros((64, 64, 3), dtype=np.uint8)
+            for _ in range(frames):
+                writer.write(frame)
+            writer.close()
+        except Exception as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+
+    if thread.is_alive():
+        return "hang", f"close() did not return within {timeout} s"
+    if "error" not in outcome:
+        return "no error", "close() returned without raising"
+    return "ok", f"{type(outcome['error']).__name__}: {outcome['error']}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=100, help="More than the writer's queue holds")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        missing = os.path.join(tmp, "missing", "out.mp4")
+        cases = [
+            ("invalid_path", VideoWriter(missing), 1),
+            ("invalid_path", VideoWriter(missing), args.frames),
+            ("close_fails", FailingCloseWriter(os.path.join(tmp, "close.mp4")), args.frames),
+            ("open_fails", FailingOpenWriter(os.path.join(tmp, "open.mp4")), args.frames),
+        ]
+
+        failed = False
+        for name, writer, frames in cases:
+            status, message = run_case(writer, frames, args.timeout)
+            failed |= status != "ok"
+            print(f"{name:<14} {frames:>4} frames  {status:<9} {message}")
+
+    if failed:
+        print("FAIL: a VideoWriter error was swallowed or close() hung")
+        sys.exit(1)
+    print("OK: close() re-raises encoder errors")
+
+
+if __name__ == "__main__":
+    main()
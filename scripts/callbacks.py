@@ -0,0 +1,83 @@
+import time
+import numpy as np
+from stable_baselines3.common.callbacks import BaseCallback
+
+
+class RenderCallback(BaseCallback):
+    """
+    Render the first training env every `render_freq` calls to env.step().
+    """
+
+    def __init__(self, render_freq, verbose=0):
+        super().__init__(verbose)
+        self.render_freq = render_freq
+
+    def _on_step(self) -> bool:
+        if self.n_calls % self.render_freq == 0:
+            self.training_env.env_method("render", indices=0)
+        return True
+
+
+class EpisodeMetricsCallback(BaseCallback):
+    """
+    Log win/draw/timeout rates and episode lengths of finished episodes.
+    Winners are read from info["winner"] (1 or 2, None/0 for a draw, -1 for a timeout).
+    """
+
+    def __init__(self, verbose=0):
+        super().__init__(verbose)
+        self.winners = []
+        self.lengths = []
+
+    def _on_training_start(self) -> None:
+        self.episode_steps = np.zeros(self.training_env.num_envs, dtype=np.int64)
+
+    def _on_step(self) -> bool:
+        self.episode_steps += 1
+
+        for i, done in enumerate(self.locals["dones"]):
+            if done:
+                self.winners.append(self.locals["infos"][i].get("winner"))
+                self.lengths.append(self.episode_steps[i])
+                self.episode_steps[i] = 0
+        return True
+
+    def _on_rollout_end(self) -> None:
+        if not self.winners:
+            return
+
+        winners = np.array([0 if w is None else w for w in self.winners])
+        self.logger.record("ctf/win_rate", np.mean(winners == 1))
+        self.logger.record("ctf/loss_rate", np.mean(winners == 2))
+        self.logger.record("ctf/draw_rate", np.mean(winners == 0))
+        self.logger.record("ctf/timeout_rate", np.mean(winners == -1))
+        self.logger.record("ctf/episode_length", np.mean(self.lengths))
+
+        self.winners, self.lengths = [], []
+
+
+class ThroughputCallback(BaseCallback):
+    """
+    Measure environment steps per second over the whole learn() call.
+    """
+
+    def __init__(self, verbose=0):
+        super().__init__(verbose)
+        self.steps_per_sec = None
+
+    def _on_training_start(self) -> None:
+        self.start_time = time.perf_counter()
+        self.start_steps = self.num_timesteps
+
+    def _on_step(self) -> bool:
+        return True
+
+    def _on_rollout_end(self) -> None:
+        elapsed = time.perf_counter() - self.start_time
+        self.logger.record("time/steps_per_sec", (self.num_timesteps - self.start_steps) / elapsed)
+
+    def _on_training_end(self) -> None:
+        elapsed = time.perf_counter() - self.start_time
+        self.steps_per_sec = (self.num_timesteps - self.start_steps) / elapsed
+
+        print(f"{self.num_timesteps - self.start_steps} steps in {elapsed:.1f}s ({self.steps_per_sec:.0f} steps/sec)")
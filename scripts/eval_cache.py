@@ -0,0 +1,182 @@
+"""
+Persistent cache of checkpoint-vs-checkpoint evaluation results.
+
+Results are stored in SQLite keyed by (policy hash, opponent hash, seed,
+config key). Policies are identified by the SHA-256 of the checkpoint file,
+so a renamed or copied checkpoint still hits the cache and an overwritten
+one does not. The config key hashes the game config, the horizon T and the
+number of episodes. Hashes are remembered per (path, size, mtime), so
+unchanged files are not re-read.
+
+evaluate() only simulates the matches that are missing and stores each
+result as soon as it finishes, so re-evaluating a growing checkpoint history
+costs only the new pairings, and an interrupted run keeps its progress.
+
+    with EvalCache("../logs/eval.sqlite") as cache:
+        results = cache.evaluate([(new, old, 0) for old in history], episodes=50)
+
+The tournament uses it with --cache:
+    python tournament.py models/team1/*.zip --mode gauntlet --cache ../logs/eval.sqlite
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from game import GameConfig
+from tournament import RESULT_DTYPE, _init_worker, play_match
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, hash TEXT
+);
+CREATE TABLE IF NOT EXISTS configs (
+    key TEXT PRIMARY KEY, description TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    policy TEXT, opponent TEXT, seed INTEGER, config TEXT,
+    wins INTEGER, losses INTEGER, draws INTEGER, timeouts INTEGER, created REAL,
+    PRIMARY KEY (policy, opponent, seed, config)
+);
+"""
+
+
+def file_hash(path, chunk_size=2**20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def config_description(config, T, episodes):
+    """
+    Everything besides the policies and the seed that changes a match result.
+    """
+    return {
+        "team_size": config.team_size,
+        "board_dims": config.board_dims.tolist(),
+        "interaction_radius": config.interaction_radius,
+        "team1_bounds": config.team1_bounds.tolist(),
+        "team2_bounds": config.team2_bounds.tolist(),
+        "T": T,
+        "episodes": episodes,
+    }
+
+
+class EvalCache:
+    """
+    SQLite results store at `path`, see the module docstring.
+    """
+
+    def __init__(self, path) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.db = sqlite3.connect(path)
+        # Readers (dashboards) don't block the writer
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+        self.hits = 0
+        self.misses = 0
+
+    def policy_hash(self, path):
+        """
+        Content hash of a checkpoint, re-read only when its size or mtime changed.
+        """
+        stat = os.stat(path)
+        path = os.path.abspath(path)
+        row = self.db.execute("SELECT size, mtime_ns, hash FROM files WHERE path = ?", (path,)).fetchone()
+        if row is not None and row[:2] == (stat.st_size, stat.st_mtime_ns):
+            return row[2]
+
+        digest = file_hash(path)
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", (path, stat.st_size, stat.st_mtime_ns, digest))
+        return digest
+
+    def config_key(self, config, T, episodes):
+        description = json.dumps(config_description(config, T, episodes), sort_keys=True)
+        key = hashlib.sha256(description.encode()).hexdigest()
+        with self.db:
+            self.db.execute("INSERT OR IGNORE INTO configs VALUES (?, ?)", (key, description))
+        return key
+
+    def lookup(self, policy, opponent, seed, config):
+        """
+        (wins, losses, draws, timeouts) for team 1, or None if the match was never played.
+        """
+        return self.db.execute(
+            "SELECT wins, losses, draws, timeouts FROM results WHERE policy = ? AND opponent = ? AND seed = ? AND config = ?",
+            (policy, opponent, seed, config),
+        ).fetchone()
+
+    def store(self, policy, opponent, seed, config, result):
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (policy, opponent, seed, config, *result, time.time()),
+            )
+
+    def evaluate(self, matches, episodes=50, T=200, config=None, workers=None, cache_bytes=512 * 2**20):
+        """
+        Results of (player path, opponent path, seed) matches as a tournament
+        results table, in the order given. Missing matches are played with
+        tournament.play_match, in-process for workers=0 and on a process pool
+        otherwise.
+        """
+        if config is None:
+            config = GameConfig()
+        config_key = self.config_key(config, T, episodes)
+
+        keys = [(self.policy_hash(player), self.policy_hash(opponent), int(seed), config_key)
+                for player, opponent, seed in matches]
+        results = [self.lookup(*key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        self.hits += len(matches) - len(missing)
+        self.misses += len(missing)
+
+        def finish(i, result):
+            self.store(*keys[i], result)
+            results[i] = result
+            player, opponent, _ = matches[i]
+            print(f"{os.path.basename(player)} vs {os.path.basename(opponent)}: "
+                  f"{result[0]}W {result[1]}L {result[2]}D {result[3]}T")
+
+        if workers == 0:
+            for i in missing:
+                finish(i, play_match(*matches[i][:2], episodes, T, matches[i][2], config))
+        elif missing:
+            with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(cache_bytes,)) as pool:
+                futures = {
+                    pool.submit(play_match, *matches[i][:2], episodes, T, matches[i][2], config): i for i in missing
+                }
+                for future in as_completed(futures):
+                    finish(futures[future], future.result())
+
+        rows = [(player, opponent) + tuple(result) for (player, opponent, _), result in zip(matches, results)]
+        return np.array(rows, dtype=RESULT_DTYPE)
+
+    def results(self):
+        """
+        Every stored result with a known path for each policy hash, for dashboards.
+        """
+        return self.db.execute("""
+            SELECT p.path, o.path, r.seed, c.description, r.wins, r.losses, r.draws, r.timeouts, r.created
+            FROM results r
+            LEFT JOIN (SELECT hash, MAX(path) AS path FROM files GROUP BY hash) p ON p.hash = r.policy
+            LEFT JOIN (SELECT hash, MAX(path) AS path FROM files GROUP BY hash) o ON o.hash = r.opponent
+            LEFT JOIN configs c ON c.key = r.config
+            ORDER BY r.created
+        """).fetchall()
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,20 +1,175 @@
-import numpy as np
-import pygame
-import pygame_gui
-import os
 import time
+import numpy as np
+from spatial_index import UniformGrid
 
 def dist(p1, p2):
     return np.sqrt(np.sum((p1-p2)**2, axis=-1))
 
+
+def interaction_weights(team_size):
+    """
+    Sign/scale matrices used to turn distances into interaction scores.
+    Rows are the source player (team 1 first, then team 2), columns the target
+    player or flag. Teammates and own flag count 1.5x, enemies count -1x.
+    """
+    team = np.arange(2 * team_size) >= team_size
+    player_weight = np.where(team[:, None] == team[None, :], 1.5, -1.0)
+    flag_weight = np.where(team[:, None] == np.array([False, True])[None, :], 1.5, -1.0)
+
+    return player_weight, flag_weight
+
+
+def score_buffers(num_players):
+    """
+    Preallocated intermediates for interaction_scores on a single game.
+    """
+    return {
+        "flag_diff": np.zeros((num_players, 2, 2)),
+        "flag_rhs": np.zeros((num_players, 2, 2)),
+        "flag_dist": np.zeros((num_players, 2)),
+        "flag_mask": np.zeros((num_players, 2), dtype=bool),
+        "flag_score": np.zeros(2),
+        "player_diff": np.zeros((num_players, num_players, 2)),
+        "player_rhs": np.zeros((num_players, num_players, 2)),
+        "player_dist": np.zeros((num_players, num_players)),
+        "player_mask": np.zeros((num_players, num_players), dtype=bool),
+        "player_score": np.zeros(num_players),
+    }
+
+
+def _weighted_scores(a, b, weight, interaction_radius, diff, rhs, distance, mask, out):
+    # weight * (d * (d < r)) summed over the source axis, all written into the given buffers.
+    # Broadcast operands are copied out first, ufuncs allocate iterator buffers for them otherwise.
+    np.copyto(diff, a)
+    np.copyto(rhs, b)
+    np.subtract(diff, rhs, out=diff)
+    np.multiply(diff, diff, out=diff)
+    np.add.reduce(diff, axis=-1, out=distance)
+    np.sqrt(distance, out=distance)
+
+    np.greater_equal(distance, interaction_radius, out=mask)
+    np.copyto(distance, 0.0, where=mask)
+    np.multiply(weight, distance, out=distance)
+
+    return np.add.reduce(distance, axis=-2, out=out)
+
+
+def interaction_scores(pos, flags, player_weight, flag_weight, interaction_radius, grid=None, buffers=None):
+    """
+    Flag and player scores for a batch of games.
+
+    pos: (..., 2 * team_size, 2) player positions, team 1 first
+    flags: (..., 2, 2) flag positions, team 1 flag first
+    grid: optional UniformGrid, player-player scores then only look at nearby cells
+    buffers: optional score_buffers() for a single game, the scores are then
+        computed without allocating and returned as views into them
+
+    Scores are accumulated over the source axis in player order, the same order
+    the original per-player loops added them in, so results are bit-identical.
+    """
+    if buffers is not None and grid is None:
+        b = buffers
+        flag_score = _weighted_scores(
+            pos[:, None, :], flags[None, :, :], flag_weight, interaction_radius,
+            b["flag_diff"], b["flag_rhs"], b["flag_dist"], b["flag_mask"], b["flag_score"]
+        )
+        player_score = _weighted_scores(
+            pos[:, None, :], pos[None, :, :], player_weight, interaction_radius,
+            b["player_diff"], b["player_rhs"], b["player_dist"], b["player_mask"], b["player_score"]
+        )
+        return flag_score, player_score
+
+    flag_dist = dist(pos[..., :, None, :], flags[..., None, :, :])
+    flag_score = np.sum(flag_weight * (flag_dist * (flag_dist < interaction_radius)), axis=-2)
+
+    if grid is None:
+        player_dist = dist(pos[..., :, None, :], pos[..., None, :, :])
+        player_score = np.sum(player_weight * (player_dist * (player_dist < interaction_radius)), axis=-2)
+    else:
+        player_score = grid.player_scores(pos, player_weight, interaction_radius)
+
+    return flag_score, player_score
+
+
+# t, winner, game_done, draw, team1_reward, team2_reward
+STATE_HEADER = 6
+
+# Player count from which the grid index beats the full distance matrix, e.g.
+# 40v40, provided the board is at least GRID_MIN_CELLS interaction radii across.
+# With fewer cells each 3x3 block covers most of the board and the grid only
+# wins at about twice the players (benchmarks/neighbors.py)
+GRID_MIN_PLAYERS = 80
+GRID_MIN_CELLS = 10
+
+
+class GameConfig:
+    """
+    Team size, board size, interaction radius and team start regions.
+
+    The start regions default to the bottom and top thirds of the board, which
+    for the default 30x30 board are the original [0, 0]-[30, 10] and [0, 20]-[30, 30].
+
+    neighbor_index picks how player-player interactions are found: "brute" for
+    the full distance matrix, "grid" for a UniformGrid, or "auto" to use the grid
+    once a game has at least `grid_min_players` players and the board is at least
+    GRID_MIN_CELLS interaction radii across (see benchmarks/neighbors.py).
+
+    backend picks how BatchedGame steps: "numpy" for the vectorized engine,
+    "numba" for the compiled kernel in kernels.py, "python" for the same kernel
+    uncompiled (slow, for checking it without numba), or "auto" to use the
+    compiled kernel when numba is installed and no grid index is in use. All
+    give the same results; Game always runs on NumPy.
+    """
+
+    def __init__(self, team_size=3, board_dims=(30, 30), interaction_radius=5.0, team1_bounds=None, team2_bounds=None,
+                 neighbor_index="auto", grid_min_players=GRID_MIN_PLAYERS, backend="numpy") -> None:
+        self.team_size = team_size
+        self.board_dims = np.array(board_dims)
+        self.interaction_radius = interaction_radius
+
+        if neighbor_index not in ("auto", "brute", "grid"):
+            raise ValueError(f"Unknown neighbor_index {neighbor_index!r}, expected 'auto', 'brute' or 'grid'.")
+        self.neighbor_index = neighbor_index
+        self.grid_min_players = grid_min_players
+
+        if backend not in ("auto", "numpy", "numba", "python"):
+            raise ValueError(f"Unknown backend {backend!r}, expected 'auto', 'numpy', 'numba' or 'python'.")
+        self.backend = backend
+
+        width, height = self.board_dims
+        if team1_bounds is None:
+            team1_bounds = [[0, 0], [width, height / 3]]
+        if team2_bounds is None:
+            team2_bounds = [[0, 2 * height / 3], [width, height]]
+
+        self.team1_bounds = np.array(team1_bounds)
+        self.team2_bounds = np.array(team2_bounds)
+
+    def make_neighbor_index(self):
+        """
+        UniformGrid for this board, or None when brute force is cheaper.
+        """
+        use_grid = self.neighbor_index == "grid" or (
+            self.neighbor_index == "auto" and 2 * self.team_size >= self.grid_min_players
+            and self.board_dims.min() / self.interaction_radius >= GRID_MIN_CELLS
+        )
+        return UniformGrid(self.board_dims, self.interaction_radius) if use_grid else None
+
+    @property
+    def obs_dim(self):
+        # [team1 players x and y, team1 flag x and y, team2 players x and y, team2 flag x and y]
+        return 2 * (2 * self.team_size + 2)
+
+
 # Player class
-class Player(pygame.sprite.Sprite):
-    def __init__(self, image_path, pos=None) -> None:
-        super().__init__()
+class Player:
+    def __init__(self, image_path, pos=None, state=None) -> None:
+        # Sprite is only loaded once a renderer is attached
+        self.image_path = image_path
 
-        # Sprite stuff
-        self.image = pygame.image.load(image_path)
-        self.image = pygame.transform.scale(self.image, (50, 60)) # Resize image
+        # [x, y, active, action], a view into the Game's flat state when owned by a Game
+        self.state = np.zeros(4) if state is None else state
+        self.pos = self.state[0:2]
 
         if pos is None:
             pos = np.array([0, 0])
@@ -23,8 +178,24 @@ class Player(pygame.sprite.Sprite):
         self.active = True
         self.action = 0.0
 
+    @property
+    def active(self):
+        return bool(self.state[2])
+
+    @active.setter
+    def active(self, active):
+        self.state[2] = active
+
+    @property
+    def action(self):
+        return self.state[3]
+
+    @action.setter
+    def action(self, action):
+        self.state[3] = action
+
     def set_pos(self, pos):
-        self.pos = pos
+        self.pos[:] = pos
 
     def set_action(self, action):
         self.action = action
@@ -34,9 +205,10 @@ class Player(pygame.sprite.Sprite):
     
     def update_pos(self, action, board_dims):
         self.action = action
-        self.pos += np.array([np.cos(action), np.sin(action)])
+        self.pos[0] += np.cos(action)
+        self.pos[1] += np.sin(action)
 
-        np.clip(self.pos, a_min=np.zeros_like(board_dims), a_max=board_dims, out=self.pos)
+        np.clip(self.pos, a_min=0, a_max=board_dims, out=self.pos)
 
         return self.pos
     
@@ -50,20 +222,20 @@ class Player(pygame.sprite.Sprite):
 class Team:
     def __init__(self, flag_path, players=[], flag_pos=None) -> None:
         self.players = players
-        self.flag_pos = flag_pos
+        # Updated in place, so it can be a view into the Game's flat state
+        self.flag_pos = np.zeros(2) if flag_pos is None else flag_pos
         # self.inactive_players = []
 
-        # Get Sprite
-        self.flag_image = pygame.image.load(flag_path)
-        self.flag_image = pygame.transform.scale(self.flag_image, (40, 60))
+        # Sprite is only loaded once a renderer is attached
+        self.flag_path = flag_path
 
-    def set_random_pos(self, lo_bound, hi_bound):
+    def set_random_pos(self, lo_bound, hi_bound, rng=np.random):
         for player in self.players:
             player.set_active()
-            pos = np.random.uniform(lo_bound, hi_bound)
+            pos = rng.uniform(lo_bound, hi_bound)
             player.set_pos(pos)
 
-        self.flag_pos = np.random.uniform(lo_bound, hi_bound)
+        self.flag_pos[:] = rng.uniform(lo_bound, hi_bound)
 
     def get_pos(self):
         pos_lst = [p.get_pos() if p.active else np.zeros([2,]) for p in self.players]
@@ -83,8 +255,8 @@ class Team:
     def num_active_players(self):
         return sum([1 if p.active else 0 for p in self.players])
 
-    def sample_action(self):
-        return np.array([np.random.uniform(0, 2*np.pi) for _ in self.players])
+    def sample_action(self, rng=np.random):
+        return rng.uniform(0, 2*np.pi, len(self.players))
     
     def remove_players(self, inactive_players):
         # print("Pre Removal ", self.inactive_players, self.active_players)
@@ -99,29 +271,70 @@ class Team:
 
 
 class Game:
-    def __init__(self, team_sprite_path, team_flag_path, T=200, screen_width=800, screen_height=800) -> None:
-        self.board_dims = np.array([30, 30])
-        self.x_scale = 800 / (self.board_dims[0])
-        self.y_scale = 800 / (self.board_dims[0])
-        self.xmin = 0
-        self.ymin = 0
+    def __init__(self, team_sprite_path, team_flag_path, T=200, screen_width=800, screen_height=800, config=None) -> None:
+        if config is None:
+            config = GameConfig()
+        self.config = config
+
+        self.board_dims = config.board_dims
 
         self.screen_width = screen_width
         self.screen_height = screen_height
 
-        # Team setup
-        self.team1 = Team(team_flag_path[0], [Player(team_sprite_path[0]) for _ in range(3)])
-        self.team2 = Team(team_flag_path[1], [Player(team_sprite_path[1]) for _ in range(3)])
-
-        self.team1_bounds = np.array([[0, 0], [30, 10]])
-        self.team2_bounds = np.array([[0, 20], [30, 30]])
+        # Flat game state: scalar header, then [x, y, active, action] per player
+        # (team 1 first), then both flags. Players and flags hold views into it,
+        # so get_state/set_state are a single copy.
+        n = config.team_size
+        self._state = np.zeros(STATE_HEADER + 4 * 2 * n + 4)
+        players = self._state[STATE_HEADER:STATE_HEADER + 8 * n].reshape(2 * n, 4)
+        flags = self._state[STATE_HEADER + 8 * n:].reshape(2, 2)
 
-        self.interaction_radius = 5.0
+        # Team setup
+        self.team1 = Team(team_flag_path[0], [Player(team_sprite_path[0], state=players[i]) for i in range(n)], flag_pos=flags[0])
+        self.team2 = Team(team_flag_path[1], [Player(team_sprite_path[1], state=players[n + i]) for i in range(n)], flag_pos=flags[1])
+
+        # Column views for the in-place step
+        self._pos = players[:, 0:2]
+        self._active = players[:, 2]
+        self._action = players[:, 3]
+        self.flags = flags
+
+        # Player positions after moving (before captures) from the last step, or the reset positions
+        self.moved = np.zeros((2 * n, 2))
+
+        # Per team (x, y, active, action) columns
+        self._team_columns = [
+            (players[team, 0], players[team, 1], players[team, 2], players[team, 3])
+            for team in (slice(0, n), slice(n, 2 * n))
+        ]
+        self._board_max = [float(d) for d in config.board_dims]
+
+        # Scratch buffers, so a step allocates no arrays
+        self._moving = np.zeros(n, dtype=bool)
+        self._frozen = np.zeros(n, dtype=bool)
+        self._cos = np.zeros(n)
+        self._sin = np.zeros(n)
+        self._captured = np.zeros(2 * n, dtype=bool)
+        self._score_buffers = score_buffers(2 * n)
+
+        self.team1_bounds = config.team1_bounds
+        self.team2_bounds = config.team2_bounds
+
+        self.interaction_radius = config.interaction_radius
+        self.player_weight, self.flag_weight = interaction_weights(config.team_size)
+        self.neighbor_index = config.make_neighbor_index()
 
         self.game_done = False
         self.draw = False
 
         self.initialized = False
+        self.renderer = None
+
+        self.rng = np.random.default_rng()
+        self.winner = None
+
+        # metrics.Metrics, None to disable
+        self.metrics = None
 
         # Time steps
         self.t = 0
@@ -129,40 +342,26 @@ class Game:
 
     def _check_distances(self):
 
-        if self.team1.num_active_players() == 0 and self.team2.num_active_players() == 0:
+        if not self._active.any():
             self.game_done = True
             return
 
-        team1_pos = self.team1.get_pos()
-        team2_pos = self.team2.get_pos()
-
-        team1_pos, flag1_pos = team1_pos[:-1], team1_pos[-1]
-        team2_pos, flag2_pos = team2_pos[:-1], team2_pos[-1]
-
-        team1_flag_score, team2_flag_score = 0, 0
-        team1_player_score = np.zeros([len(team1_pos)])
-        team2_player_score = np.zeros([len(team2_pos)])
-
-        for pos in team1_pos:
-            team1_flag_score += (1.5*(dist(pos, flag1_pos))*(dist(pos, flag1_pos)<self.interaction_radius))
-            team2_flag_score -= ((dist(pos, flag2_pos)) * (dist(pos, flag2_pos)<self.interaction_radius))
-
-            team1_player_score += (1.5*(dist(pos, team1_pos)) * (dist(pos, team1_pos)<self.interaction_radius))
-            team2_player_score -= ((dist(pos, team2_pos)) * (dist(pos, team2_pos)<self.interaction_radius))
-
-        
-        for pos in team2_pos:
-            team2_flag_score += (1.5*(dist(pos, flag2_pos))*(dist(pos, flag2_pos)<self.interaction_radius))
-            team1_flag_score -= ((dist(pos, flag1_pos)) * (dist(pos, flag1_pos)<self.interaction_radius))
-
-            team2_player_score += (1.5*(dist(pos, team2_pos)) * (dist(pos, team2_pos)<self.interaction_radius))
-            team1_player_score -= ((dist(pos, team1_pos)) * (dist(pos, team1_pos)<self.interaction_radius))
+        # One pairwise distance matrix over all players and both flags
+        n = self.config.team_size
+        flag_score, player_score = interaction_scores(
+            self._pos, self.flags, self.player_weight, self.flag_weight, self.interaction_radius,
+            self.neighbor_index, self._score_buffers
+        )
 
-        flag1_cap = team1_flag_score < 0
-        flag2_cap = team2_flag_score < 0
+        flag1_cap = flag_score[0] < 0
+        flag2_cap = flag_score[1] < 0
         self.game_done = flag1_cap or flag2_cap
         self.draw = flag2_cap and flag1_cap
 
+        if self.metrics is not None:
+            self.metrics.count("flag_captures/team1", int(flag2_cap))
+            self.metrics.count("flag_captures/team2", int(flag1_cap))
+
         if self.game_done:
             if not self.draw:
                 if flag2_cap:
@@ -178,74 +377,62 @@ class Game:
                 self.team1_reward -= 20
                 self.team2_reward -= 20
             return
-        
-        t1_inactive_players = [i for i,s in enumerate(team1_player_score) if s < 0]
-        t2_inactive_players = [i for i,s in enumerate(team2_player_score) if s < 0]
 
-        self.team1_reward += (3*len(t2_inactive_players) - 3*len(t1_inactive_players))
-        self.team2_reward += (3*len(t1_inactive_players) - 3*len(t2_inactive_players))
-        
-        self.team1.remove_players(t1_inactive_players)
-        self.team2.remove_players(t2_inactive_players)
+        captured = np.less(player_score, 0, out=self._captured)
+        t1_captured = np.count_nonzero(captured[:n])
+        t2_captured = np.count_nonzero(captured[n:])
 
-    
-    def render(self):
-        if not self.initialized:
-            raise ValueError("Environment not initialized. Call reset() before calling render().")
-        
-        time.sleep(0.075)
+        if self.metrics is not None:
+            self.metrics.count("captures/team1", t2_captured)
+            self.metrics.count("captures/team2", t1_captured)
 
-        # Clear screen
-        self.screen.fill((209, 255, 214))
+        self.team1_reward += (3*t2_captured - 3*t1_captured)
+        self.team2_reward += (3*t1_captured - 3*t2_captured)
 
-        # Draw line and buffer zone
-        # Create a surface for the transparent line
-        line_surface = pygame.Surface((self.screen.get_width(), 5), pygame.SRCALPHA)  # 5 pixels tall line with transparency
-        line_surface.fill((0, 0, 0, 0))  # Transparent background
+        # Captured players are deactivated and parked at the origin, as Team.remove_players does
+        if t1_captured or t2_captured:
+            np.copyto(self._active, 0.0, where=captured)
+            np.copyto(self._pos, 0.0, where=captured[:, None])
 
-        # Draw the line on the transparent surface
-        mid_y = self.screen.get_height() // 2  # Middle of the screen (Y-coordinate)
-        pygame.draw.line(line_surface, (0, 0, 0, 120), (0, 0), (self.screen.get_width(), 0), 5)  # Line with alpha
-
-        # Blit the transparent line surface onto the main screen at the correct position
-        self.screen.blit(line_surface, (0, mid_y - 2))  # Center the line vertically
+    def _move(self, team, action):
+        # Team.apply_action on the flat state: active players move one unit and are clipped to the board
+        if action is None:
+            return
 
-        # Draw a shaded region (buffer zone) in the middle of the screen
-        buffer_zone_height = 10 * self.y_scale # Height of the buffer zone
-        buffer_zone_width = self.screen.get_width()
-        buffer_zone_rect = pygame.Rect(0, mid_y - buffer_zone_height // 2, buffer_zone_width, buffer_zone_height)
+        x, y, active, last_action = self._team_columns[team]
+        moving = np.not_equal(active, 0, out=self._moving)
+        frozen = np.logical_not(moving, out=self._frozen)
 
-        # Add some transparency to the buffer zone by using a surface
-        buffer_zone_surface = pygame.Surface((buffer_zone_width, buffer_zone_height))
-        buffer_zone_surface.set_alpha(40)  # Set alpha for transparency
-        buffer_zone_surface.fill((0, 0, 0))  # Fill with blue color (can change)
+        cos = np.cos(action, out=self._cos)
+        sin = np.sin(action, out=self._sin)
+        np.copyto(cos, 0.0, where=frozen)
+        np.copyto(sin, 0.0, where=frozen)
 
-        # Blit the buffer zone surface to the screen
-        self.screen.blit(buffer_zone_surface, (0, mid_y - buffer_zone_height // 2))
-        for player in self.team1.players:
-            if player.active:
-                pos = player.get_pos()
-                grid_pos = self._grid_to_screen(pos)
+        np.add(x, cos, out=x)
+        np.add(y, sin, out=y)
+        for coord, hi in ((x, self._board_max[0]), (y, self._board_max[1])):
+            np.maximum(coord, 0.0, out=coord)
+            np.minimum(coord, hi, out=coord)
 
-                self.screen.blit(player.image, grid_pos)
+        np.copyto(last_action, action, where=moving)
 
-        for player in self.team2.players:
-            if player.active:
-                pos = player.get_pos()
-                grid_pos = self._grid_to_screen(pos)
+    def attach_renderer(self, render_fps=None, offscreen=False):
+        """
+        Create the pygame renderer. Game logic never touches pygame until this is called.
+        """
+        from renderer import Renderer
 
-                self.screen.blit(player.image, grid_pos)
+        self.renderer = Renderer(self, self.screen_width, self.screen_height, render_fps=render_fps, offscreen=offscreen)
+        return self.renderer
 
-        # Draw flags
-        flag1_pos = self.team1.flag_pos
-        flag2_pos = self.team2.flag_pos
-        flag1_screen_pos = self._grid_to_screen(flag1_pos)
-        flag2_screen_pos = self._grid_to_screen(flag2_pos)
+    def render(self):
+        if not self.initialized:
+            raise ValueError("Environment not initialized. Call reset() before calling render().")
 
-        self.screen.blit(self.team1.flag_image, flag1_screen_pos)
-        self.screen.blit(self.team2.flag_image, flag2_screen_pos)
+        if self.renderer is None:
+            self.attach_renderer()
 
-        pygame.display.flip()
+        self.renderer.draw()
 
 
     # Move one unit step in the direction specified
@@ -255,13 +442,35 @@ class Game:
         
         if self.t >= self.T:
             return True, self.team1.get_pos(), self.team2.get_pos(), self.team1.get_action(), self.team2.get_action(), self.team1_reward, self.team2_reward
-        
-        print("\n\n",self.t)
+
+        done = self.step_inplace(team1_action, team2_action)
+
+        n = self.config.team_size
+        return done, self.moved[:n].copy(), self.moved[n:].copy(), self.team1.get_action(), self.team2.get_action(), self.team1_reward, self.team2_reward
+
+    def step_inplace(self, team1_action, team2_action):
+        """
+        Step without allocating: the state is updated in place and the player
+        positions after moving are left in self.moved. Returns done.
+        """
+        if not self.initialized:
+            raise ValueError("Environment not initialized. Call reset() before calling step().")
+
+        if self.t >= self.T:
+            np.copyto(self.moved, self._pos)
+            return True
+
+        if self.metrics is not None:
+            start = time.perf_counter()
 
         self.team1_reward = -0.1
         self.team2_reward = -0.1
-        t1_pos = self.team1.apply_action(team1_action, self.board_dims)
-        t2_pos = self.team2.apply_action(team2_action, self.board_dims)
+
+        n = self.config.team_size
+        self._move(0, team1_action)
+        self._move(1, team2_action)
+        np.copyto(self.moved, self._pos)
+
         self._check_distances()
 
         self.t += 1
@@ -271,22 +480,73 @@ class Game:
             self.winner = -1
 
         done = self.game_done
-        # pos_obs = np.concat([self.team1.get_pos(), self.team2.get_pos()]).flatten()
-
-        return done, t1_pos, t2_pos, self.team1.get_action(), self.team2.get_action(), self.team1_reward, self.team2_reward
-
-
-    def _grid_to_screen(self, pos):
-        # Convert grid position to screen coordinates
-        screen_x = self.x_scale * (pos[0] - self.xmin)
-        screen_y = 800 - self.y_scale * (pos[1] - self.ymin)  # Invert Y to match Pygame screen
-        return (screen_x, screen_y)   
-
 
-    @property
-    # Return state
-    def _state(self):
-        pass
+        if self.metrics is not None:
+            self.metrics.observe("step_latency", time.perf_counter() - start)
+            if done:
+                self.metrics.record_episode(self.t, self.winner)
+            self.metrics.step()
+
+        return done
+
+    def step_repeat(self, team1_action, team2_action, repeat, stop_on_capture=True):
+        """
+        Action repeat: up to `repeat` step_inplace calls with the same actions.
+
+        Stops early when the game ends (flag capture, elimination or the T step
+        horizon, which still counts single steps) or, with stop_on_capture, as
+        soon as a player is captured, so the policy decides again right after
+        every event. team1_reward and team2_reward hold the rewards summed over
+        the steps taken. Returns (done, steps taken).
+        """
+        team1_reward = team2_reward = 0.0
+        num_active = np.count_nonzero(self._active)
+
+        for steps in range(1, repeat + 1):
+            done = self.step_inplace(team1_action, team2_action)
+            team1_reward += self.team1_reward
+            team2_reward += self.team2_reward
+
+            if done:
+                break
+            if stop_on_capture and np.count_nonzero(self._active) != num_active:
+                break
+
+        self.team1_reward, self.team2_reward = team1_reward, team2_reward
+        return done, steps
+
+
+    def get_active(self, out=None):
+        """
+        (2 * team_size,) bool mask of the active players, team 1 first.
+        """
+        return np.not_equal(self._active, 0, out=out)
+
+    def get_state(self):
+        """
+        Snapshot of the game as a flat float64 array (see set_state).
+
+        The RNG is not part of the snapshot, use rng.bit_generator.state for that.
+        """
+        winner = np.nan if self.winner is None else self.winner
+        self._state[:STATE_HEADER] = (self.t, winner, self.game_done, self.draw, self.team1_reward, self.team2_reward)
+
+        return self._state.copy()
+
+    def set_state(self, state):
+        """
+        Restore a snapshot taken with get_state.
+        """
+        self._state[:] = state
+        # The snapshot has no positions after moving, use the restored ones as reset does
+        np.copyto(self.moved, self._pos)
+
+        t, winner, game_done, draw, self.team1_reward, self.team2_reward = self._state[:STATE_HEADER]
+        self.t = int(t)
+        self.winner = None if np.isnan(winner) else int(winner)
+        self.game_done = bool(game_done)
+        self.draw = bool(draw)
+        self.initialized = True
 
 
     @property
@@ -305,22 +565,33 @@ class Game:
             return True
 
 
-    def reset(self):
+    def reset(self, seed=None, start=None):
+        """
+        Start a new episode from uniform random positions in the team bounds, or
+        from `start` = (pos, active, flags) of one scenarios.ScenarioBank entry.
+        """
+        # A seed restarts the game's RNG, otherwise it carries on from the last episode
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+
         self.team1_reward = 0
         self.team2_reward = 0
         self.game_done = False
+        self.draw = False
+        self.winner = None
         self.t = 0
 
         self.initialized = True
 
-        # Initialize Pygame
-        pygame.init()
-        self.screen = pygame.display.set_mode((self.screen_width, self.screen_height))
-        self.clock = pygame.time.Clock()
-        self.manager = pygame_gui.UIManager((self.screen_width, self.screen_height))
-
-    
-        self.team1.set_random_pos(self.team1_bounds[0], self.team1_bounds[1])
-        self.team2.set_random_pos(self.team2_bounds[0], self.team2_bounds[1])
+        if start is None:
+            self.team1.set_random_pos(self.team1_bounds[0], self.team1_bounds[1], self.rng)
+            self.team2.set_random_pos(self.team2_bounds[0], self.team2_bounds[1], self.rng)
+        else:
+            pos, active, flags = start
+            np.copyto(self._pos, pos)
+            np.copyto(self._active, active)
+            np.copyto(self._action, 0.0)
+            np.copyto(self.flags, flags)
+        np.copyto(self.moved, self._pos)
         
         return self.team1.get_pos(), self.team2.get_pos()
@@ -2,6 +2,8 @@ import gymnasium as gym
 from gymnasium import spaces
 import numpy as np
 from game import Game
+from observations import make_encoder
+from opponent import OpponentPolicy, opponent_observation
 from typing import Optional
 import time
 
@@ -10,24 +12,31 @@ class CTFEnv(gym.Env):
     Gym wrapper for the Capture the Flag game.
     """
 
-    metadata = {"render.modes": ["human"], "render_fps": 30}
+    metadata = {"render_modes": ["human", "rgb_array"], "render_fps": 30}
 
-    def __init__(self, team_sprite_path, team_flag_path, T=200, screen_width=800, screen_height=800):
+    def __init__(self, team_sprite_path, team_flag_path, T=200, screen_width=800, screen_height=800, render_mode="human", config=None,
+                 copy_obs=True, obs_encoder="flat", action_repeat=1, stop_on_capture=True):
         super().__init__()
 
+        # render_mode=None runs headless: render() is a no-op and pygame is never imported.
+        # "rgb_array" draws offscreen (no display needed) and render() returns the frame.
+        self.render_mode = render_mode
+
         # Initialize the game
         self.game = Game(
             team_sprite_path,
             team_flag_path,
             T=T,
             screen_width=screen_width,
-            screen_height=screen_height
+            screen_height=screen_height,
+            config=config
         )
+        config = self.game.config
 
-        # Observation space
-        # [team1 players x and y, team1 flag x and y, team2 players x and y, team2 flag x and y]
-        obs_dim = 2 * (2 * len(self.game.team1.players) + 2) # Positions of players and flags (x, y)
-        self.observation_space = spaces.Box(low=0, high=30, shape=(obs_dim,), dtype=np.float32)
+        # Observation space, from an observations.py encoder ("flat", "relative", "grid" or an instance).
+        # "flat" is [team1 players x and y, team1 flag x and y, team2 players x and y, team2 flag x and y]
+        self.obs_encoder = make_encoder(obs_encoder, config)
+        self.observation_space = self.obs_encoder.space
 
         # Angles for team members (scaled)
         self.action_space = spaces.Box(low=-1, high=1, shape=(len(self.game.team1.players),), dtype=np.float32)
@@ -36,17 +45,82 @@ class CTFEnv(gym.Env):
 
         self.opponent_policy = "stationary"
         self.opponent_model = None
-
-    def rescale_action(self, action):
-        # Rescale action from [-1, 1] to [0, 2π]
-        if action is not None:
-            return (action + 1) * np.pi
-        else:
+        self.league = None
+        self.opponent_path = None
+        self.trajectory_writer = None
+        self.scenarios = None
+
+        # Observations are written into one preallocated buffer. copy_obs=False returns
+        # that buffer itself from reset/step, it is overwritten by the next call.
+        self.copy_obs = copy_obs
+        self._obs = np.zeros(self.obs_encoder.shape, dtype=np.float32)
+        self._active = np.zeros(2 * config.team_size, dtype=bool)
+        self._action = np.zeros(config.team_size, dtype=np.float32)
+
+        # Each step repeats the chosen (and opponent) actions for up to `action_repeat` game
+        # steps, stopping early on game end or, with stop_on_capture, on a capture (Game.step_repeat).
+        # T still counts game steps, rewards are summed over the repeated steps.
+        if action_repeat < 1:
+            raise ValueError(f"action_repeat must be at least 1, got {action_repeat!r}.")
+        self.action_repeat = action_repeat
+        self.stop_on_capture = stop_on_capture
+
+    def rescale_action(self, action, out=None):
+        # Rescale action from [-1, 1] to [0, 2π], in place into `out` if it has the action's dtype
+        if action is None:
             return None
+        if out is not None and getattr(action, "dtype", None) == out.dtype:
+            np.add(action, 1, out=out)
+            return np.multiply(out, np.pi, out=out)
+        return (action + 1) * np.pi
+
+    def _get_obs(self):
+        # Encode the positions of the last reset/step as a batch of one
+        self.game.get_active(out=self._active)
+        self.obs_encoder.encode(self.game.moved[None], self._active[None], self.game.flags[None], out=self._obs[None])
+
+        return self._obs.copy() if self.copy_obs else self._obs
 
     def set_opponent_policy(self, policy_type, model=None):
+        """
+        policy_type is "stationary", "random", "learned" (model is the policy) or
+        "league" (model is a League, a new opponent is sampled every episode).
+        """
         self.opponent_policy = policy_type
-        self.opponent_model = model
+        self.league = model if policy_type == "league" else None
+        self.opponent_path = None
+        self.opponent_model = OpponentPolicy(model) if model is not None and self.league is None else None
+
+    def set_scenarios(self, scenarios):
+        """
+        Start episodes from a scenarios.ScenarioBank or Curriculum instead of
+        uniform random positions (None to go back). Finished episodes are
+        reported to it with record_result(winner).
+        """
+        self.scenarios = scenarios
+
+    def set_trajectory_writer(self, writer):
+        """
+        Log every episode to a single-env trajectory.TrajectoryWriter (None to stop).
+        """
+        if writer is not None:
+            writer.fit(1, self.game.T, self.game.config, self.action_repeat)
+        self.trajectory_writer = writer
+
+    def set_metrics(self, metrics):
+        """
+        Record game metrics into a metrics.Metrics (None to disable).
+        """
+        self.game.metrics = metrics
+
+    def _game_state(self):
+        # (1, ...) batches of the current positions, flags and active mask
+        players = self.game.team1.players + self.game.team2.players
+        pos = np.array([p.get_pos() for p in players])[None]
+        flags = np.stack((self.game.team1.flag_pos, self.game.team2.flag_pos))[None]
+        active = np.array([p.active for p in players])[None]
+
+        return pos, flags, active
 
     def _get_opponent_action(self):
         """
@@ -55,71 +129,88 @@ class CTFEnv(gym.Env):
         if self.opponent_policy == "stationary":
             return None  # No movement
         elif self.opponent_policy == "random":
-            return np.random.uniform(0, 2 * np.pi, len(self.game.team2.players))
-        elif self.opponent_policy == "learned" and self.opponent_model:
-            # Current state information
-            t1_pos = self.game.team1.get_pos().flatten()  # Team 1 player positions
-            t2_pos = self.game.team2.get_pos().flatten()  # Team 2 player positions
-
-            # Flip positions to make it look like Team 2's side is the "home side"
-            board_width = self.game.board_dims[0]
-            board_height = self.game.board_dims[1]
-            
-            # Flip x-coordinates and y-coordinates for both teams and flags
-            flipped_t1_pos = np.array([[board_width - x, board_height - y] for x, y in t1_pos.reshape(-1, 2)]).flatten()
-            flipped_t2_pos = np.array([[board_width - x, board_height - y] for x, y in t2_pos.reshape(-1, 2)]).flatten()
-
-            # Transform the observation to Team 2's perspective
-            obs_from_team2_perspective = np.concatenate((flipped_t2_pos, flipped_t1_pos))
-            
-            # Use the opponent model to predict actions
-            if hasattr(self.opponent_model, "predict"):
-                opponent_action = self.opponent_model.predict(obs_from_team2_perspective)[0]  # Assuming the model's predict method outputs actions
-            else:
-                raise ValueError("Provided opponent model does not have a 'predict' method.")
-
-            flipped_opponent_action = np.array([(action + np.pi) % (2 * np.pi) for action in opponent_action])
+            return self.np_random.uniform(0, 2 * np.pi, len(self.game.team2.players))
+        elif self.opponent_policy in ("learned", "league") and self.opponent_model:
+            # Batch of one, encoded like team 1's observations from Team 2's perspective
+            pos, flags, active = self._game_state()
+            obs = opponent_observation(self.obs_encoder, pos, active, flags, self.game.board_dims)
 
-            # Return the adjusted action for Team 1 (same action space dimension)
-            return flipped_opponent_action
+            return self.opponent_model(obs)[0]
 
 
     def reset(self, seed: Optional[int] = None, options: Optional[dict] = None):
-        print("Resetting evironment")
-        team1_pos, team2_pos = self.game.reset()
+        super().reset(seed=seed)
+
+        if self.league is not None:
+            self.opponent_path, model = self.league.sample()
+            self.opponent_model = OpponentPolicy(model) if model is not None else None
+
+        # Start positions and the random opponent share the env's seeded generator
+        self.game.rng = self.np_random
+        if self.scenarios is None:
+            self.game.reset()
+        else:
+            pos, active, flags = self.scenarios.draw(1, self.np_random)
+            self.game.reset(start=(pos[0], active[0], flags[0]))
+
+        if self.trajectory_writer is not None:
+            self.trajectory_writer.begin_episodes([True], *self._game_state())
 
-        obs = np.concatenate((team1_pos.flatten(), team2_pos.flatten()))
-        return np.array(obs, dtype=np.float32), {}
+        return self._get_obs(), {}
     
     def step(self, action):
-        team1_action = self.rescale_action(action)
+        team1_action = self.rescale_action(action, self._action)
         team2_action = self.rescale_action(self._get_opponent_action())
 
-        # Step the game
-        done, t1_pos, t2_pos, t1_act, t2_act, team1_reward, team2_reward = self.game.step(
-            team1_action, team2_action
-        )
-
-        flag1 = self.game.team1.flag_pos
-        flag2 = self.game.team2.flag_pos
+        # Step the game in place, the observation is read from its buffers
+        if self.action_repeat == 1:
+            done = self.game.step_inplace(team1_action, team2_action)
+        else:
+            done, _ = self.game.step_repeat(team1_action, team2_action, self.action_repeat, self.stop_on_capture)
+        team1_reward, team2_reward = self.game.team1_reward, self.game.team2_reward
 
-        # Flatten positions into a single array for observation
-        obs = np.concatenate((t1_pos.flatten(), flag1.flatten(), t2_pos.flatten(), flag2.flatten()))
+        obs = self._get_obs()
 
         reward = team1_reward
         truncated = False
 
+        if self.trajectory_writer is not None:
+            n = len(self.game.team1.players)
+            actions = np.concatenate([
+                np.full(n, np.nan) if a is None else a for a in (team1_action, team2_action)
+            ])
+            self.trajectory_writer.record(*self._game_state(), actions[None], np.array([[team1_reward, team2_reward]]))
+            if done:
+                winner = 0 if self.game.winner is None else self.game.winner
+                self.trajectory_writer.end_episodes([True], [winner])
+
         if done:
-            info = self.game.winner
-            print("Game done.")
+            info = {"winner": self.game.winner}
+            if self.league is not None and self.opponent_path is not None:
+                self.league.record_result(self.opponent_path, self.game.winner)
+            if self.scenarios is not None:
+                self.scenarios.record_result(self.game.winner)
         else:
             info = {}
 
-        return np.array(obs, dtype=np.float32), reward, bool(done), truncated, info
+        return obs, reward, bool(done), truncated, info
     
-    def render(self, mode='human'):
+    def render(self):
+        if self.render_mode is None:
+            return
+
+        if self.game.renderer is None:
+            if self.render_mode == "rgb_array":
+                self.game.attach_renderer(offscreen=True)
+            else:
+                # Pace the window to render_fps
+                self.game.attach_renderer(render_fps=self.metadata["render_fps"])
+
         self.game.render()
 
+        if self.render_mode == "rgb_array":
+            return self.game.renderer.frame()
+
     def close(self):
         pass
 
@@ -0,0 +1,163 @@
+"""
+Optional compiled step kernel for BatchedGame.
+
+advance_games does one BatchedGame step, moving, clipping, scoring,
+captures, rewards and the horizon, in a single loop over games and
+players. It is compiled with numba.njit when numba is installed. Without
+numba, BatchedGame keeps its vectorized NumPy path, which the kernel
+reproduces bit for bit: distances and scores are summed in the same order,
+inactive players still interact from the origin, and cos/sin are computed
+by NumPy before the call so float32 angles round the same way.
+
+Select it with GameConfig(backend="numba"), or "auto" to use it whenever
+numba is importable. backend="python" runs the same kernel uncompiled,
+far slower than NumPy, so it can be checked where numba is not installed:
+benchmarks/kernel_parity.py checks it against the NumPy engine and Game.
+"""
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+HAVE_NUMBA = numba is not None
+
+# Per game counters written by advance_games, for metrics
+FLAG_CAPTURES_TEAM1, FLAG_CAPTURES_TEAM2, CAPTURES_TEAM1, CAPTURES_TEAM2 = range(4)
+
+
+def resolve_backend(backend, neighbor_index=None):
+    """
+    "numpy", "numba" or "python" for a GameConfig backend. The kernel scores every pair
+    of players, so "auto" stays on NumPy when a grid neighbor index is in use.
+    """
+    if backend == "auto":
+        return "numba" if HAVE_NUMBA and neighbor_index is None else "numpy"
+    if backend == "numba" and not HAVE_NUMBA:
+        raise ImportError("backend='numba' needs numba installed (pip install numba).")
+
+    return backend
+
+
+def advance_games(pos, active, flags, actions, moved, t, rewards, done, winner, running,
+                  move1, angle1, cos1, sin1, move2, angle2, cos2, sin2,
+                  board_x, board_y, player_weight, flag_weight, radius, T, events):
+    """
+    Step the games in `running` in place, as BatchedGame._advance.
+
+    angle/cos/sin are (N, team_size) per team and only read if that team's
+    move flag is set. events gets the per game capture counts.
+    """
+    num_games, num_players = active.shape
+    n = num_players // 2
+    flag_score = np.zeros(2)
+    player_score = np.zeros(num_players)
+
+    for g in range(num_games):
+        events[g, :] = 0
+        if not running[g]:
+            rewards[g, 0] = 0.0
+            rewards[g, 1] = 0.0
+            continue
+
+        rewards[g, 0] = -0.1
+        rewards[g, 1] = -0.1
+
+        # Active players move one unit and are clipped to the board
+        for p in range(num_players):
+            i = p % n
+            if p < n:
+                if not move1 or not active[g, p]:
+                    continue
+                dx, dy, angle = cos1[g, i], sin1[g, i], angle1[g, i]
+            else:
+                if not move2 or not active[g, p]:
+                    continue
+                dx, dy, angle = cos2[g, i], sin2[g, i], angle2[g, i]
+
+            pos[g, p, 0] = min(max(pos[g, p, 0] + dx, 0.0), board_x)
+            pos[g, p, 1] = min(max(pos[g, p, 1] + dy, 0.0), board_y)
+            actions[g, p] = angle
+
+        team1_out = True
+        team2_out = True
+        for p in range(num_players):
+            moved[g, p, 0] = pos[g, p, 0]
+            moved[g, p, 1] = pos[g, p, 1]
+            if active[g, p]:
+                if p < n:
+                    team1_out = False
+                else:
+                    team2_out = False
+
+        if team1_out and team2_out:
+            winner[g] = 0
+            done[g] = True
+        else:
+            # Scores summed over source players in order, like interaction_scores
+            for f in range(2):
+                score = 0.0
+                for p in range(num_players):
+                    dx = pos[g, p, 0] - flags[g, f, 0]
+                    dy = pos[g, p, 1] - flags[g, f, 1]
+                    d = np.sqrt(dx * dx + dy * dy)
+                    score += flag_weight[p, f] * (d if d < radius else 0.0)
+                flag_score[f] = score
+
+            flag1_cap = flag_score[0] < 0
+            flag2_cap = flag_score[1] < 0
+            if flag1_cap or flag2_cap:
+                events[g, FLAG_CAPTURES_TEAM1] = flag2_cap
+                events[g, FLAG_CAPTURES_TEAM2] = flag1_cap
+                if flag1_cap and flag2_cap:
+                    rewards[g, 0] -= 20
+                    rewards[g, 1] -= 20
+                    winner[g] = 0
+                elif flag2_cap:
+                    rewards[g, 0] += 10
+                    rewards[g, 1] += -10
+                    winner[g] = 1
+                else:
+                    rewards[g, 0] += -10
+                    rewards[g, 1] += 10
+                    winner[g] = 2
+                done[g] = True
+            else:
+                for q in range(num_players):
+                    score = 0.0
+                    for p in range(num_players):
+                        dx = pos[g, p, 0] - pos[g, q, 0]
+                        dy = pos[g, p, 1] - pos[g, q, 1]
+                        d = np.sqrt(dx * dx + dy * dy)
+                        score += player_weight[p, q] * (d if d < radius else 0.0)
+                    player_score[q] = score
+
+                t1_captured = 0
+                t2_captured = 0
+                for q in range(num_players):
+                    if player_score[q] < 0:
+                        if q < n:
+                            t1_captured += 1
+                        else:
+                            t2_captured += 1
+                        active[g, q] = False
+                        pos[g, q, 0] = 0.0
+                        pos[g, q, 1] = 0.0
+
+                rewards[g, 0] += 3 * t2_captured - 3 * t1_captured
+                rewards[g, 1] += 3 * t1_captured - 3 * t2_captured
+                events[g, CAPTURES_TEAM1] = t2_captured
+                events[g, CAPTURES_TEAM2] = t1_captured
+
+        t[g] += 1
+        if t[g] >= T:
+            done[g] = True
+            winner[g] = -1
+
+
+# Uncompiled, for backend="python"
+advance_games_python = advance_games
+
+if HAVE_NUMBA:
+    advance_games = numba.njit(cache=True)(advance_games)
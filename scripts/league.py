@@ -0,0 +1,194 @@
+import os
+import re
+from collections import OrderedDict
+import numpy as np
+
+# team1_450000_steps.zip (CheckpointCallback) and team1_epoch_3.zip (train_agent)
+CHECKPOINT_PATTERN = r"{prefix}_(?:(?P<steps>\d+)_steps|epoch_(?P<epoch>\d+))\.zip"
+
+
+class CheckpointIndex:
+    """
+    Sorted list of the checkpoints saved under a directory, oldest first.
+
+    Checkpoints are ordered by modification time, then by step count/epoch, so
+    freshly saved policies come last even when files from a checkout share a mtime.
+    """
+
+    def __init__(self, directory, prefix="team1") -> None:
+        self.directory = directory
+        self.pattern = re.compile(CHECKPOINT_PATTERN.format(prefix=re.escape(prefix)))
+        self.paths = []
+        self.refresh()
+
+    def refresh(self):
+        """
+        Rescan the directory, returns the number of checkpoints found.
+        """
+        entries = []
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                match = self.pattern.fullmatch(name)
+                if match is None:
+                    continue
+                path = os.path.join(self.directory, name)
+                number = int(match["steps"] or match["epoch"])
+                entries.append((os.path.getmtime(path), number, path))
+
+        self.paths = [path for _, _, path in sorted(entries)]
+        return len(self.paths)
+
+    def latest(self):
+        return self.paths[-1] if self.paths else None
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __getitem__(self, i):
+        return self.paths[i]
+
+
+def _model_nbytes(model):
+    """
+    Bytes held by a loaded model's parameters and optimizer state.
+    """
+    if hasattr(model, "nbytes"):
+        return model.nbytes
+
+    policy = getattr(model, "policy", None)
+    if policy is None:
+        return 0
+
+    nbytes = sum(p.numel() * p.element_size() for p in policy.parameters())
+
+    optimizer = getattr(policy, "optimizer", None)
+    if optimizer is not None:
+        for state in optimizer.state.values():
+            nbytes += sum(v.numel() * v.element_size() for v in state.values() if hasattr(v, "numel"))
+
+    return nbytes
+
+
+def _load_ppo(path):
+    from stable_baselines3 import PPO
+
+    return PPO.load(path, device="cpu")
+
+
+def load_policy(path):
+    """
+    A policy_export file as a NumpyPolicy (no torch import), anything else as a PPO checkpoint.
+    """
+    from policy_export import EXTENSION, NumpyPolicy
+
+    if path.endswith(EXTENSION):
+        return NumpyPolicy(path)
+    return _load_ppo(path)
+
+
+class PolicyCache:
+    """
+    LRU cache of deserialized policies keyed by checkpoint path.
+
+    Least recently used policies are evicted once the cached models hold more
+    than `max_bytes`; the most recently loaded one is always kept. Exported
+    .policy files load as memory-mapped NumpyPolicy objects.
+    """
+
+    def __init__(self, max_bytes=512 * 2**20, loader=load_policy) -> None:
+        self.max_bytes = max_bytes
+        self.loader = loader
+        self.models = OrderedDict()
+        self.nbytes = {}
+
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, path):
+        if path in self.models:
+            self.hits += 1
+            self.models.move_to_end(path)
+            return self.models[path]
+
+        self.misses += 1
+        model = self.loader(path)
+        self.models[path] = model
+        self.nbytes[path] = _model_nbytes(model)
+
+        while len(self.models) > 1 and self.total_bytes > self.max_bytes:
+            evicted, _ = self.models.popitem(last=False)
+            del self.nbytes[evicted]
+
+        return model
+
+    @property
+    def total_bytes(self):
+        return sum(self.nbytes.values())
+
+    def __contains__(self, path):
+        return path in self.models
+
+    def __len__(self):
+        return len(self.models)
+
+
+class League:
+    """
+    Opponent pool over the checkpoints in a CheckpointIndex.
+
+    Strategies for sample():
+        "latest"      - always the newest checkpoint
+        "uniform"     - uniform over all checkpoints
+        "prioritized" - weighted towards opponents the learner struggles with,
+                        (1 - learner win rate) ** priority_power, with unplayed
+                        opponents counted as a 50% win rate
+    """
+
+    STRATEGIES = ("latest", "uniform", "prioritized")
+
+    def __init__(self, index, cache=None, strategy="latest", priority_power=2.0, seed=None) -> None:
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown strategy {strategy!r}, expected one of {self.STRATEGIES}.")
+
+        self.index = index
+        self.cache = cache if cache is not None else PolicyCache()
+        self.strategy = strategy
+        self.priority_power = priority_power
+        self.rng = np.random.default_rng(seed)
+
+        # Learner results per opponent checkpoint
+        self.games = {}
+        self.wins = {}
+
+    def win_rate(self, path):
+        games = self.games.get(path, 0)
+        return self.wins.get(path, 0) / games if games else 0.5
+
+    def sample_path(self):
+        paths = self.index.paths
+        if not paths:
+            return None
+
+        if self.strategy == "latest":
+            return paths[-1]
+        elif self.strategy == "uniform":
+            return paths[self.rng.integers(len(paths))]
+
+        weights = np.array([(1 - self.win_rate(p)) ** self.priority_power for p in paths]) + 1e-6
+        return paths[self.rng.choice(len(paths), p=weights / weights.sum())]
+
+    def sample(self):
+        """
+        Returns (checkpoint path, loaded model), or (None, None) for an empty pool.
+        """
+        path = self.sample_path()
+        if path is None:
+            return None, None
+        return path, self.cache.load(path)
+
+    def record_result(self, path, winner):
+        """
+        Record a finished episode against `path`; winner 1 is a learner (team 1) win.
+        """
+        self.games[path] = self.games.get(path, 0) + 1
+        self.wins[path] = self.wins.get(path, 0) + (winner == 1)
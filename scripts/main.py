@@ -1,7 +1,7 @@
 from training import self_play_training, validation
 from gym_env import CTFEnv
 from stable_baselines3.common.monitor import Monitor
-from stable_baselines3 import PPO, ppo
+from league import PolicyCache
 
 
 def main():
@@ -10,15 +10,19 @@ def main():
     # Training
     # self_play_training(env, save_dir="./models", total_timesteps=5000, self_play_epochs=10)
 
-    opp_model = PPO.load("./models/team1/team1_550000_steps.zip")
-    model = PPO.load("./models/team1/team1_540000_steps.zip")
+    # Loaded policies are cached, so checkpoints reused below are deserialized once
+    policies = PolicyCache()
+
+    opp_name, name = "team1_550000_steps", "team1_540000_steps"
+    opp_model = policies.load(f"./models/team1/{opp_name}.zip")
+    model = policies.load(f"./models/team1/{name}.zip")
     num_episodes = 1
 
-    metrics = validation(env, num_episodes, model, opp_model)
+    metrics = validation(env, num_episodes, model, opp_model, name, opp_name)
     # Evaluation
-    opp_model = PPO.load("./models/team1/team1_290000_steps.zip")
-    env.set_opponent_policy("learned", opp_model)
-    model = PPO.load("./models/team1/team1_290000_steps.zip")
+    opp_model = policies.load("./models/team1/team1_290000_steps.zip")
+    env.unwrapped.set_opponent_policy("learned", opp_model)
+    model = policies.load("./models/team1/team1_290000_steps.zip")
 
     for _ in range(5):
         obs, info = env.reset()
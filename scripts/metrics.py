@@ -0,0 +1,189 @@
+"""
+In-memory counters and histograms for the simulator, flushed periodically.
+
+Engines hold a `metrics` attribute that is None by default; every
+instrumentation point is guarded by `if self.metrics is not None`, so a
+disabled Metrics costs one attribute check per step and nothing else.
+
+    metrics = Metrics(make_sink("logs/metrics.jsonl"), flush_every=100_000)
+    env.set_metrics(metrics)
+    ...
+    metrics.close()
+
+Counters are cumulative. Histograms keep the values seen since the last flush
+and are summarized (count, mean, min, max, p50, p90, p99) when flushed.
+"""
+import csv
+import json
+import time
+import numpy as np
+
+# Game.winner / BatchedGame.winner codes -> metric names
+WINNER_NAMES = {1: "team1", 2: "team2", 0: "draw", None: "draw", -1: "timeout"}
+
+
+class Histogram:
+    """
+    Values observed since the last clear().
+    """
+
+    PERCENTILES = (50, 90, 99)
+
+    def __init__(self) -> None:
+        self.values = []
+
+    def add(self, value):
+        self.values.append(value)
+
+    def add_many(self, values):
+        self.values.extend(np.asarray(values).ravel().tolist())
+
+    def summary(self):
+        if not self.values:
+            return {"count": 0}
+
+        values = np.asarray(self.values, dtype=np.float64)
+        summary = {"count": len(values), "mean": float(values.mean()), "min": float(values.min()), "max": float(values.max())}
+        for p, v in zip(self.PERCENTILES, np.percentile(values, self.PERCENTILES)):
+            summary[f"p{p}"] = float(v)
+
+        return summary
+
+    def clear(self):
+        self.values = []
+
+
+class Metrics:
+    """
+    Counters and histograms aggregated in memory.
+
+    `step(n)` advances the environment step count and flushes to `sink` every
+    `flush_every` steps (never if flush_every is None). Without a sink, flush()
+    only resets the histograms, read the values with snapshot() before that.
+    """
+
+    def __init__(self, sink=None, flush_every=10000) -> None:
+        self.sink = sink
+        self.flush_every = flush_every
+
+        self.counters = {}
+        self.histograms = {}
+
+        self.steps = 0
+        self.last_flush = 0
+        self.start_time = time.perf_counter()
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def histogram(self, name):
+        if name not in self.histograms:
+            self.histograms[name] = Histogram()
+        return self.histograms[name]
+
+    def observe(self, name, value):
+        self.histogram(name).add(value)
+
+    def observe_many(self, name, values):
+        self.histogram(name).add_many(values)
+
+    def record_episode(self, length, winner):
+        self.observe("episode_length", length)
+        self.count(f"winner/{WINNER_NAMES[winner]}")
+
+    def step(self, n=1):
+        self.steps += n
+        if self.flush_every is not None and self.steps - self.last_flush >= self.flush_every:
+            self.flush()
+
+    def snapshot(self):
+        """
+        Flat {name: value} of the counters and histogram summaries.
+        """
+        record = {"steps": self.steps, "elapsed": time.perf_counter() - self.start_time}
+        record.update(self.counters)
+        for name, histogram in self.histograms.items():
+            for stat, value in histogram.summary().items():
+                record[f"{name}/{stat}"] = value
+
+        return record
+
+    def flush(self):
+        if self.sink is not None:
+            self.sink.write(self.steps, self.snapshot())
+
+        for histogram in self.histograms.values():
+            histogram.clear()
+        self.last_flush = self.steps
+
+    def close(self):
+        self.flush()
+        if self.sink is not None:
+            self.sink.close()
+
+
+class JSONLSink:
+    """
+    One JSON object per flush.
+    """
+
+    def __init__(self, path) -> None:
+        self.file = open(path, "a")
+
+    def write(self, step, record):
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class CSVSink:
+    """
+    Long format (steps, name, value) rows, so new metrics don't change the header.
+    """
+
+    def __init__(self, path) -> None:
+        self.file = open(path, "a", newline="")
+        self.writer = csv.writer(self.file)
+        if self.file.tell() == 0:
+            self.writer.writerow(("steps", "name", "value"))
+
+    def write(self, step, record):
+        self.writer.writerows((step, name, value) for name, value in record.items() if name != "steps")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class TensorBoardSink:
+    """
+    Scalars to anything with add_scalar(tag, value, step), a torch
+    SummaryWriter on `log_dir` by default.
+    """
+
+    def __init__(self, log_dir=None, writer=None) -> None:
+        if writer is None:
+            from torch.utils.tensorboard import SummaryWriter
+            writer = SummaryWriter(log_dir)
+        self.writer = writer
+
+    def write(self, step, record):
+        for name, value in record.items():
+            if name != "steps":
+                self.writer.add_scalar(f"ctf/{name}", value, step)
+
+    def close(self):
+        self.writer.close()
+
+
+def make_sink(path):
+    """
+    Sink for `path` by extension: .jsonl, .csv, anything else is a TensorBoard log dir.
+    """
+    if path.endswith(".jsonl"):
+        return JSONLSink(path)
+    elif path.endswith(".csv"):
+        return CSVSink(path)
+    return TensorBoardSink(path)
@@ -0,0 +1,176 @@
+"""
+Observation encoders.
+
+Every encoder turns a batch of game states into observations for team 1:
+    pos:    (N, 2 * team_size, 2) player positions, team 1 first
+    active: (N, 2 * team_size) bool
+    flags:  (N, 2, 2) flag positions, team 1 flag first
+Use mirror() first to encode from team 2's side.
+
+    "flat"     - [team 1 players, team 1 flag, team 2 players, team 2 flag] in
+                 board coordinates, the original CTFEnv observation
+    "relative" - per team 1 player: its normalized position and the offsets to
+                 both flags and every other player, plus active flags
+    "grid"     - (4, H, W) occupancy planes for own players, enemy players, own
+                 flag and enemy flag, like create_team_mask in capture_the_flag.py
+"""
+import numpy as np
+from gymnasium import spaces
+
+
+def mirror(pos, active, flags, board_dims):
+    """
+    The same batch seen from team 2: the board is mirrored through its center
+    and team 2 comes first, as in opponent.opponent_observation.
+    """
+    n = pos.shape[-2] // 2
+    pos = np.concatenate((board_dims - pos[:, n:], board_dims - pos[:, :n]), axis=1)
+    active = np.concatenate((active[:, n:], active[:, :n]), axis=1)
+    flags = board_dims - flags[:, ::-1]
+
+    return pos, active, flags
+
+
+class FlatEncoder:
+    """
+    Raw positions, (N, 2 * (2 * team_size + 2)).
+    """
+
+    def __init__(self, config) -> None:
+        self.team_size = config.team_size
+        self.shape = (config.obs_dim,)
+        self.space = spaces.Box(low=0, high=config.board_dims.max(), shape=self.shape, dtype=np.float32)
+
+    def encode(self, pos, active, flags, out=None):
+        num_games, n = pos.shape[0], self.team_size
+        if out is None:
+            out = np.empty((num_games,) + self.shape, dtype=np.float32)
+
+        rows = out.reshape(num_games, 2 * n + 2, 2)
+        np.copyto(rows[:, :n], pos[:, :n])
+        np.copyto(rows[:, n], flags[:, 0])
+        np.copyto(rows[:, n + 1:2 * n + 1], pos[:, n:])
+        np.copyto(rows[:, 2 * n + 1], flags[:, 1])
+
+        return out
+
+
+class RelativeEncoder:
+    """
+    Egocentric features per team 1 player, concatenated over the team.
+
+    For each player: its position / board size, the offsets to its own and the
+    enemy flag, the offsets to every other player (teammates first, zero for
+    inactive players), the other players' active flags and its own active flag.
+    Offsets are divided by the board size, so everything is in [-1, 1].
+    """
+
+    def __init__(self, config) -> None:
+        n = self.team_size = config.team_size
+        self.scale = config.board_dims.astype(np.float64)
+
+        # Indices of the other 2n - 1 players for each team 1 player
+        self.others = np.array([[j for j in range(2 * n) if j != i] for i in range(n)])
+
+        self.agent_dim = 2 + 4 + 3 * (2 * n - 1) + 1
+        self.shape = (n * self.agent_dim,)
+        self.space = spaces.Box(low=-1, high=1, shape=self.shape, dtype=np.float32)
+
+    def encode_agents(self, pos, active, flags):
+        """
+        (N, team_size, agent_dim) features, one row per team 1 player.
+        """
+        n = self.team_size
+        pos = pos / self.scale
+        flags = flags / self.scale
+        own = pos[:, :n, None, :]
+
+        others = (pos[:, self.others] - own) * active[:, self.others, None]
+        to_flags = flags[:, None, :, :] - own
+
+        return np.concatenate((
+            pos[:, :n],
+            to_flags.reshape(*to_flags.shape[:2], 4),
+            others.reshape(*others.shape[:2], -1),
+            active[:, self.others],
+            active[:, :n, None],
+        ), axis=2).astype(np.float32)
+
+    def encode(self, pos, active, flags, out=None):
+        obs = self.encode_agents(pos, active, flags).reshape(pos.shape[0], -1)
+        if out is None:
+            return obs
+
+        np.copyto(out, obs)
+        return out
+
+
+class OccupancyGridEncoder:
+    """
+    Rasterized (4, H, W) planes: own players, enemy players, own flag, enemy flag.
+
+    Cell [y, x] covers board_dims / resolution units with y = 0 at the bottom of
+    the board. Each object also marks the cells within `spread` cells of it
+    (spread=1 stamps the 3x3 block create_team_mask uses). Captured players are
+    not drawn.
+    """
+
+    def __init__(self, config, resolution=None, spread=0) -> None:
+        self.team_size = config.team_size
+        self.board_dims = config.board_dims.astype(np.float64)
+        self.resolution = np.array(resolution if resolution is not None else config.board_dims, dtype=np.int64)
+
+        # (x, y) offsets of the stamp around each object
+        r = np.arange(-spread, spread + 1)
+        self.offsets = np.stack(np.meshgrid(r, r, indexing="ij"), axis=-1).reshape(-1, 2)
+
+        width, height = self.resolution
+        self.shape = (4, height, width)
+        self.space = spaces.Box(low=0, high=1, shape=self.shape, dtype=np.float32)
+
+        # Plane of each object, in the order they are stacked in encode
+        n = self.team_size
+        self.channels = np.concatenate((np.zeros(n), np.ones(n), [2, 3])).astype(np.int64)
+
+    def encode(self, pos, active, flags, out=None):
+        num_games = pos.shape[0]
+        if out is None:
+            out = np.empty((num_games,) + self.shape, dtype=np.float32)
+        out[...] = 0.0
+
+        # (N, 2n + 2, 2) objects, flags always drawn
+        objects = np.concatenate((pos, flags), axis=1)
+        visible = np.concatenate((active, np.ones((num_games, 2), dtype=bool)), axis=1)
+
+        cells = np.floor(objects / self.board_dims * self.resolution).astype(np.int64)
+        cells = np.minimum(cells, self.resolution - 1)
+
+        # (N, objects, stamp, 2) cells to mark
+        stamped = cells[:, :, None, :] + self.offsets
+        inside = visible[:, :, None] & ((stamped >= 0) & (stamped < self.resolution)).all(axis=-1)
+
+        game = np.broadcast_to(np.arange(num_games)[:, None, None], inside.shape)
+        channel = np.broadcast_to(self.channels[None, :, None], inside.shape)
+        out[game[inside], channel[inside], stamped[..., 1][inside], stamped[..., 0][inside]] = 1.0
+
+        return out
+
+
+ENCODERS = {
+    "flat": FlatEncoder,
+    "relative": RelativeEncoder,
+    "grid": OccupancyGridEncoder,
+}
+
+
+def make_encoder(encoder, config, **kwargs):
+    """
+    Encoder instance from a name in ENCODERS (extra kwargs go to its constructor),
+    or `encoder` itself if it already is one.
+    """
+    if not isinstance(encoder, str):
+        return encoder
+    if encoder not in ENCODERS:
+        raise ValueError(f"Unknown observation encoder {encoder!r}, expected one of {list(ENCODERS)}.")
+
+    return ENCODERS[encoder](config, **kwargs)
@@ -0,0 +1,65 @@
+import numpy as np
+from observations import mirror
+
+
+def opponent_observation(encoder, pos, active, flags, board_dims, out=None):
+    """
+    Observation from team 2's perspective for a batch of games.
+
+    pos, active, flags are the (N, ...) batches the observations.py encoders
+    take. The board is mirrored through its center so team 2's side looks like
+    the home side and team 2 comes first (observations.mirror), then encoded
+    with `encoder`, the same encoder team 1 observes with, so an opponent sees
+    what it saw when it was trained as team 1.
+    """
+    return encoder.encode(*mirror(pos, active, flags, board_dims), out=out)
+
+
+def flip_action(action):
+    # Rotate actions back into team 1's frame
+    return (action + np.pi) % (2 * np.pi)
+
+
+class OpponentPolicy:
+    """
+    Frozen opponent that evaluates a batch of observations in one forward pass.
+
+    For stable-baselines3 models the policy is put in eval mode once and called
+    directly under torch.inference_mode(), skipping the per-call checks and
+    conversions of model.predict. Anything else with a predict(obs) method is
+    called as is.
+    """
+
+    def __init__(self, model, deterministic=False) -> None:
+        if not hasattr(model, "predict"):
+            raise ValueError("Provided opponent model does not have a 'predict' method.")
+
+        self.model = model
+        self.deterministic = deterministic
+
+        self.policy = getattr(model, "policy", None)
+        if self.policy is not None:
+            self.policy.set_training_mode(False)
+            self.low = self.policy.action_space.low
+            self.high = self.policy.action_space.high
+
+    def predict(self, obs):
+        """
+        (N, obs_dim) observations to (N, action_dim) actions in [-1, 1].
+        """
+        if self.policy is None:
+            return self.model.predict(obs, deterministic=self.deterministic)[0]
+
+        import torch
+
+        with torch.inference_mode():
+            obs_tensor = torch.as_tensor(obs, device=self.policy.device)
+            actions = self.policy._predict(obs_tensor, deterministic=self.deterministic).cpu().numpy()
+
+        return np.clip(actions, self.low, self.high)
+
+    def __call__(self, obs):
+        """
+        Team 2 actions, in team 1's frame, from a batch of opponent_observation()s.
+        """
+        return flip_action(self.predict(obs))
@@ -0,0 +1,215 @@
+"""
+Multi-agent Capture the Flag with every player as its own agent.
+
+CTFParallelEnv follows the PettingZoo parallel API (reset/step on dicts keyed by
+agent name) on top of a single Game, without depending on pettingzoo.
+CTFParallelVecEnv is the array version for many games on a BatchedGame: all
+agents of all games are stepped in one call, which is what a shared-parameter
+policy wants for batched inference.
+
+Agents are "team1_0" ... "team1_{n-1}", "team2_0" ... "team2_{n-1}". Every agent
+gets the observations.RelativeEncoder features of its own player, and team 2
+agents see the board mirrored (as opponent.opponent_observation does), so both
+teams can share one policy. Actions are a single value in [-1, 1] per agent,
+scaled to an angle like CTFEnv; team 2 angles are rotated back into the board
+frame. Each agent is rewarded with its team's reward.
+
+An agent terminates when it is captured or the game ends on a flag capture,
+all agents are truncated when the game times out.
+"""
+import numpy as np
+from gymnasium import spaces
+from batched_game import BatchedGame
+from game import Game
+from observations import RelativeEncoder, mirror
+from opponent import flip_action
+
+
+def agent_names(team_size):
+    return [f"team{team}_{i}" for team in (1, 2) for i in range(team_size)]
+
+
+def agent_observations(encoder, pos, active, flags, board_dims):
+    """
+    (N, 2 * team_size, agent_dim) observations, team 1 agents first, team 2 agents mirrored.
+    """
+    team1 = encoder.encode_agents(pos, active, flags)
+    team2 = encoder.encode_agents(*mirror(pos, active, flags, board_dims))
+
+    return np.concatenate((team1, team2), axis=1)
+
+
+def agent_angles(actions, team_size):
+    """
+    (..., 2 * team_size) actions in [-1, 1] to board-frame angles for team 1 and team 2.
+    """
+    angles = (actions + 1) * np.pi
+    return angles[..., :team_size], flip_action(angles[..., team_size:])
+
+
+class CTFParallelEnv:
+    """
+    PettingZoo-style parallel environment over one Game.
+    """
+
+    metadata = {"name": "ctf_parallel_v0", "render_modes": ["human", "rgb_array"], "render_fps": 30}
+
+    def __init__(self, team_sprite_path, team_flag_path, T=200, screen_width=800, screen_height=800, render_mode=None,
+                 config=None):
+        self.render_mode = render_mode
+        self.game = Game(team_sprite_path, team_flag_path, T=T, screen_width=screen_width, screen_height=screen_height,
+                         config=config)
+        self.config = self.game.config
+        self.team_size = self.config.team_size
+
+        self.encoder = RelativeEncoder(self.config)
+        self.possible_agents = agent_names(self.team_size)
+        self.agent_index = {agent: i for i, agent in enumerate(self.possible_agents)}
+        self.agents = []
+
+        self._observation_space = spaces.Box(low=-1, high=1, shape=(self.encoder.agent_dim,), dtype=np.float32)
+        self._action_space = spaces.Box(low=-1, high=1, shape=(1,), dtype=np.float32)
+
+    def observation_space(self, agent):
+        return self._observation_space
+
+    def action_space(self, agent):
+        return self._action_space
+
+    def _observations(self):
+        obs = agent_observations(
+            self.encoder, self.game.moved[None], self.game.get_active()[None], self.game.flags[None], self.game.board_dims
+        )[0]
+        return {agent: obs[self.agent_index[agent]] for agent in self.agents}
+
+    def state(self):
+        """
+        Global state: the flat CTFEnv observation.
+        """
+        pos = self.game.moved
+        n = self.team_size
+        return np.concatenate((pos[:n], self.game.flags[:1], pos[n:], self.game.flags[1:])).ravel().astype(np.float32)
+
+    def reset(self, seed=None, options=None):
+        self.game.reset(seed=seed)
+        self.agents = list(self.possible_agents)
+
+        return self._observations(), {agent: {} for agent in self.agents}
+
+    def step(self, actions):
+        """
+        `actions` needs an action for every live agent, as in PettingZoo. There is
+        no stand-still action (0 is an angle like any other); actions for agents
+        that are already done are ignored, captured players don't move.
+        """
+        missing = [agent for agent in self.agents if agent not in actions]
+        if missing:
+            raise ValueError(f"No action for live agents {missing}.")
+
+        batch = np.zeros(2 * self.team_size, dtype=np.float32)
+        for agent in self.agents:
+            batch[self.agent_index[agent]] = np.asarray(actions[agent]).item()
+        team1_angle, team2_angle = agent_angles(batch, self.team_size)
+
+        done = self.game.step_inplace(team1_angle, team2_angle)
+        active = self.game.get_active()
+        timeout = done and self.game.winner == -1
+
+        observations = self._observations()
+        team_rewards = (self.game.team1_reward, self.game.team2_reward)
+        rewards, terminations, truncations, infos = {}, {}, {}, {}
+        for agent in self.agents:
+            i = self.agent_index[agent]
+            rewards[agent] = float(team_rewards[i >= self.team_size])
+            terminations[agent] = bool(done and not timeout) or not active[i]
+            truncations[agent] = bool(timeout)
+            infos[agent] = {"winner": self.game.winner} if done else {}
+
+        self.agents = [agent for agent in self.agents if not (terminations[agent] or truncations[agent])]
+
+        if self.render_mode == "human":
+            self.render()
+
+        return observations, rewards, terminations, truncations, infos
+
+    def render(self):
+        if self.render_mode is None:
+            return
+
+        if self.game.renderer is None:
+            if self.render_mode == "rgb_array":
+                self.game.attach_renderer(offscreen=True)
+            else:
+                self.game.attach_renderer(render_fps=self.metadata["render_fps"])
+
+        self.game.render()
+
+        if self.render_mode == "rgb_array":
+            return self.game.renderer.frame()
+
+    def close(self):
+        pass
+
+
+class CTFParallelVecEnv:
+    """
+    All agents of `num_envs` games as arrays, stepped in one vectorized call.
+
+    step takes (num_envs, 2 * team_size) actions and returns observations
+    (num_envs, 2 * team_size, agent_dim), rewards, terminated and truncated
+    (num_envs, 2 * team_size) and a list of per-game infos. Finished games are
+    reset automatically; info["winner"] and info["terminal_observation"] hold
+    the final state. Captured agents stay in the arrays with terminated set
+    until their game resets, their actions are ignored.
+    """
+
+    def __init__(self, num_envs, T=200, seed=None, config=None) -> None:
+        self.game = BatchedGame(num_envs, T=T, seed=seed, config=config)
+        self.config = self.game.config
+        self.num_envs = num_envs
+        self.team_size = self.config.team_size
+        self.num_agents = 2 * self.team_size
+
+        self.encoder = RelativeEncoder(self.config)
+        self.possible_agents = agent_names(self.team_size)
+        self.observation_space = spaces.Box(low=-1, high=1, shape=(self.encoder.agent_dim,), dtype=np.float32)
+        self.action_space = spaces.Box(low=-1, high=1, shape=(1,), dtype=np.float32)
+
+    def _observations(self, mask=None):
+        game = self.game
+        if mask is None:
+            return agent_observations(self.encoder, game.moved, game.active, game.flags, game.board_dims)
+        return agent_observations(self.encoder, game.moved[mask], game.active[mask], game.flags[mask], game.board_dims)
+
+    def seed(self, seed=None):
+        self.game.rng = np.random.default_rng(seed)
+
+    def reset(self):
+        self.game.reset()
+        return self._observations()
+
+    def step(self, actions):
+        team1_angle, team2_angle = agent_angles(np.asarray(actions).reshape(self.num_envs, self.num_agents), self.team_size)
+
+        done, _, _, team1_reward, team2_reward = self.game.step(team1_angle, team2_angle)
+        obs = self._observations()
+
+        n = self.team_size
+        rewards = np.repeat(np.stack((team1_reward, team2_reward), axis=1), n, axis=1).astype(np.float32)
+        timeout = done & (self.game.winner == -1)
+        terminated = (done & ~timeout)[:, None] | ~self.game.active
+        truncated = np.repeat(timeout[:, None], self.num_agents, axis=1)
+
+        infos = [{} for _ in range(self.num_envs)]
+        if done.any():
+            for i in np.flatnonzero(done):
+                infos[i]["winner"] = int(self.game.winner[i])
+                infos[i]["terminal_observation"] = obs[i].copy()
+
+            self.game.reset(done)
+            obs[done] = self._observations(done)
+
+        return obs, rewards, terminated, truncated, infos
+
+    def close(self):
+        pass
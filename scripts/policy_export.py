@@ -0,0 +1,199 @@
+"""
+Inference-only policy files and a NumPy runner for them.
+
+A stable-baselines3 checkpoint carries the whole PPO object (value network,
+optimizer state, schedules) and needs torch to load. export_policy keeps only
+what predict uses: the actor MLP, log_std and the observation/action
+metadata, in one file laid out as
+
+    MAGIC | header length (uint64) | JSON header | padding | float32 weights
+
+The weights start on a 64-byte boundary and are memory-mapped by
+NumpyPolicy, so loading is a header parse, and every process evaluating the
+same file shares its pages through the page cache. Nothing here imports
+torch except export_policy itself.
+
+Run from the scripts directory to export checkpoints next to their zips:
+    python policy_export.py models/team1/*.zip
+"""
+import argparse
+import json
+import os
+import numpy as np
+
+MAGIC = b"CTFPOLICY1\n"
+EXTENSION = ".policy"
+ALIGNMENT = 64
+
+
+def _elu(x):
+    np.copyto(x, np.expm1(x), where=x < 0)
+    return x
+
+
+# In place on float32 activations
+ACTIVATIONS = {
+    "tanh": lambda x: np.tanh(x, out=x),
+    "relu": lambda x: np.maximum(x, 0, out=x),
+    "elu": _elu,
+    None: lambda x: x,
+}
+
+# torch module class name -> ACTIVATIONS key
+TORCH_ACTIVATIONS = {"Tanh": "tanh", "ReLU": "relu", "ELU": "elu"}
+
+
+def _data_offset(header_length):
+    # Weights start at the first ALIGNMENT boundary after the header
+    end = len(MAGIC) + 8 + header_length
+    return -(-end // ALIGNMENT) * ALIGNMENT
+
+
+def _actor_layers(policy):
+    """
+    [(weight, bias, activation)] of the actor MLP followed by action_net, weights as (in, out).
+    """
+    from torch import nn
+    from stable_baselines3.common.distributions import DiagGaussianDistribution
+    from stable_baselines3.common.torch_layers import FlattenExtractor
+
+    if not isinstance(policy.action_dist, DiagGaussianDistribution) or policy.squash_output:
+        raise ValueError("Only Gaussian policies with Box actions can be exported.")
+    if not isinstance(policy.pi_features_extractor, FlattenExtractor):
+        raise ValueError("Only policies with a FlattenExtractor can be exported.")
+
+    modules = list(policy.mlp_extractor.policy_net) + [policy.action_net]
+    layers = []
+    for module in modules:
+        if isinstance(module, nn.Linear):
+            layers.append([module.weight.detach().cpu().numpy().T, module.bias.detach().cpu().numpy(), None])
+        elif type(module).__name__ in TORCH_ACTIVATIONS and layers:
+            layers[-1][2] = TORCH_ACTIVATIONS[type(module).__name__]
+        else:
+            raise ValueError(f"Cannot export actor module {module!r}.")
+
+    return layers
+
+
+def export_policy(model, path):
+    """
+    Write the inference weights of a PPO model (or a path to its zip) to `path`.
+    """
+    if isinstance(model, str):
+        from league import _load_ppo
+        model = _load_ppo(model)
+
+    policy = model.policy
+    arrays, layers = [], []
+    offset = 0
+
+    def add(array):
+        nonlocal offset
+        array = np.ascontiguousarray(array, dtype=np.float32)
+        arrays.append(array)
+        entry = [offset, list(array.shape)]
+        offset += array.size
+        return entry
+
+    for weight, bias, activation in _actor_layers(policy):
+        layers.append({"weight": add(weight), "bias": add(bias), "activation": activation})
+
+    header = {
+        "layers": layers,
+        "log_std": add(policy.log_std.detach().cpu().numpy()),
+        "obs_shape": list(policy.observation_space.shape),
+        "action_low": policy.action_space.low.tolist(),
+        "action_high": policy.action_space.high.tolist(),
+    }
+    encoded = json.dumps(header).encode()
+    start = _data_offset(len(encoded))
+
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(np.uint64(len(encoded)).tobytes())
+        f.write(encoded)
+        f.write(b"\0" * (start - f.tell()))
+        for array in arrays:
+            f.write(array.tobytes())
+
+    return path
+
+
+class NumpyPolicy:
+    """
+    Runs an exported policy with NumPy, on a batch or a single observation.
+
+    predict follows the stable-baselines3 signature, so NumpyPolicy works as
+    an opponent or tournament player anywhere a loaded PPO does: actions are
+    the Gaussian mean (deterministic) or a sample from it, clipped to the
+    action bounds.
+    """
+
+    def __init__(self, path, mmap=True, seed=None) -> None:
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not an exported policy file.")
+            length = int(np.frombuffer(f.read(8), dtype=np.uint64)[0])
+            header = json.loads(f.read(length))
+            start = _data_offset(length)
+
+        if mmap:
+            data = np.memmap(path, dtype=np.float32, mode="r", offset=start)
+        else:
+            data = np.fromfile(path, dtype=np.float32, offset=start)
+
+        def view(entry):
+            offset, shape = entry
+            return data[offset:offset + int(np.prod(shape))].reshape(shape)
+
+        self.path = path
+        self.layers = [(view(layer["weight"]), view(layer["bias"]), ACTIVATIONS[layer["activation"]])
+                       for layer in header["layers"]]
+        self.std = np.exp(view(header["log_std"]))
+        self.obs_shape = tuple(header["obs_shape"])
+        self.low = np.array(header["action_low"], dtype=np.float32)
+        self.high = np.array(header["action_high"], dtype=np.float32)
+        self.nbytes = data.nbytes
+        self.rng = np.random.default_rng(seed)
+
+    def forward(self, obs):
+        """
+        (N, *obs_shape) observations to (N, action_dim) Gaussian means.
+        """
+        x = np.asarray(obs, dtype=np.float32).reshape(len(obs), -1)
+        for weight, bias, activation in self.layers:
+            x = x @ weight
+            x += bias
+            x = activation(x)
+        return x
+
+    def predict(self, obs, state=None, episode_start=None, deterministic=False):
+        obs = np.asarray(obs, dtype=np.float32)
+        single = obs.shape == self.obs_shape
+        if single:
+            obs = obs[None]
+
+        actions = self.forward(obs)
+        if not deterministic:
+            actions += self.std * self.rng.standard_normal(actions.shape, dtype=np.float32)
+        np.clip(actions, self.low, self.high, out=actions)
+
+        return (actions[0] if single else actions), None
+
+
+def exported_path(checkpoint):
+    return os.path.splitext(checkpoint)[0] + EXTENSION
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("checkpoints", nargs="+", help="stable-baselines3 PPO zips")
+    args = parser.parse_args()
+
+    for checkpoint in args.checkpoints:
+        path = export_policy(checkpoint, exported_path(checkpoint))
+        print(f"{checkpoint} -> {path} ({os.path.getsize(path)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
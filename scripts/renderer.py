@@ -0,0 +1,112 @@
+import pygame
+
+
+class Renderer:
+    """
+    Pygame renderer for a Game. Opens the display and loads sprites on creation,
+    so headless training never imports pygame.
+
+    The board background never changes, so it is drawn once and every frame only
+    blits it and the sprites on top. Frames are paced with a pygame Clock to
+    `render_fps` (None to draw as fast as possible). With offscreen=True frames
+    are drawn to a plain surface: no window, no display needed, no pacing.
+    """
+
+    def __init__(self, game, screen_width=800, screen_height=800, render_fps=None, offscreen=False) -> None:
+        self.game = game
+        self.offscreen = offscreen
+        self.render_fps = None if offscreen else render_fps
+
+        self.x_scale = screen_width / (game.board_dims[0])
+        self.y_scale = screen_height / (game.board_dims[1])
+        self.xmin = 0
+        self.ymin = 0
+
+        if offscreen:
+            self.screen = pygame.Surface((screen_width, screen_height))
+        else:
+            # Initialize Pygame
+            pygame.init()
+            self.screen = pygame.display.set_mode((screen_width, screen_height))
+        self.clock = pygame.time.Clock()
+
+        # Sprites, loaded once per image path
+        self.sprites = {}
+        self.background = self._draw_background()
+
+    def load_sprite(self, image_path, size):
+        if image_path not in self.sprites:
+            image = pygame.transform.scale(pygame.image.load(image_path), size) # Resize image
+
+            # Match the display's pixel format so blits don't convert every frame
+            self.sprites[image_path] = image if self.offscreen else image.convert_alpha()
+
+        return self.sprites[image_path]
+
+    def _grid_to_screen(self, pos):
+        # Convert grid position to screen coordinates
+        screen_x = self.x_scale * (pos[0] - self.xmin)
+        screen_y = self.screen.get_height() - self.y_scale * (pos[1] - self.ymin)  # Invert Y to match Pygame screen
+        return (screen_x, screen_y)
+
+    def _draw_background(self):
+        background = pygame.Surface(self.screen.get_size())
+
+        # Clear screen
+        background.fill((209, 255, 214))
+
+        # Draw line and buffer zone
+        # Create a surface for the transparent line
+        line_surface = pygame.Surface((background.get_width(), 5), pygame.SRCALPHA)  # 5 pixels tall line with transparency
+        line_surface.fill((0, 0, 0, 0))  # Transparent background
+
+        # Draw the line on the transparent surface
+        mid_y = background.get_height() // 2  # Middle of the screen (Y-coordinate)
+        pygame.draw.line(line_surface, (0, 0, 0, 120), (0, 0), (background.get_width(), 0), 5)  # Line with alpha
+
+        # Blit the transparent line surface onto the background at the correct position
+        background.blit(line_surface, (0, mid_y - 2))  # Center the line vertically
+
+        # Draw a shaded region (buffer zone) in the middle of the screen
+        buffer_zone_height = (self.game.team2_bounds[0][1] - self.game.team1_bounds[1][1]) * self.y_scale # Height of the buffer zone
+        buffer_zone_width = background.get_width()
+
+        # Add some transparency to the buffer zone by using a surface
+        buffer_zone_surface = pygame.Surface((buffer_zone_width, buffer_zone_height))
+        buffer_zone_surface.set_alpha(40)  # Set alpha for transparency
+        buffer_zone_surface.fill((0, 0, 0))  # Fill with blue color (can change)
+
+        # Blit the buffer zone surface to the background
+        background.blit(buffer_zone_surface, (0, mid_y - buffer_zone_height // 2))
+
+        return background if self.offscreen else background.convert()
+
+    def draw(self):
+        # Static layer
+        self.screen.blit(self.background, (0, 0))
+
+        for team in (self.game.team1, self.game.team2):
+            for player in team.players:
+                if player.active:
+                    pos = player.get_pos()
+                    grid_pos = self._grid_to_screen(pos)
+
+                    self.screen.blit(self.load_sprite(player.image_path, (50, 60)), grid_pos)
+
+        # Draw flags
+        for team in (self.game.team1, self.game.team2):
+            flag_screen_pos = self._grid_to_screen(team.flag_pos)
+
+            self.screen.blit(self.load_sprite(team.flag_path, (40, 60)), flag_screen_pos)
+
+        if not self.offscreen:
+            pygame.display.flip()
+
+        if self.render_fps:
+            self.clock.tick(self.render_fps)
+
+    def frame(self):
+        """
+        Copy of the current frame as an (H, W, 3) uint8 RGB array.
+        """
+        return pygame.surfarray.array3d(self.screen).swapaxes(0, 1)
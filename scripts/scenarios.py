@@ -0,0 +1,261 @@
+"""
+Start-state banks and a difficulty curriculum.
+
+A ScenarioBank holds M start configurations as arrays (player positions,
+active mask, flags) plus a difficulty score for each. Banks are generated
+ahead of time, vectorized over the whole bank, validated and saved as .npz.
+Resetting from a bank is then an array copy (Game.reset / BatchedGame.reset
+with start=...).
+
+    bank = ScenarioBank.concatenate([
+        generate(config, 20000, "uniform", seed=0),
+        generate(config, 20000, "midline_flags", seed=1),
+        generate(config, 20000, "outnumbered", seed=2, missing=1),
+    ])
+    bank.save("scenarios/3v3.npz")
+    env.set_scenarios(Curriculum(bank, levels=5))
+
+Generators, by name in SCENARIOS:
+    "uniform"       - the default reset, players and flags uniform in the team bounds
+    "midline_flags" - both flags within `band` of the midline, on their own side
+    "outnumbered"   - `missing` players of `team` start captured
+    "pre_captured"  - every player starts captured with probability `p`,
+                      keeping at least one player per team
+
+Difficulty is from team 1's side, in [0, 1]: the mean of how far team 1's
+players are from the enemy flag, how close team 2's players are to team 1's
+flag (both relative to the board diagonal) and how outnumbered team 1 is.
+"""
+import numpy as np
+from game import interaction_scores, interaction_weights
+
+
+def _uniform_starts(config, size, rng):
+    n = config.team_size
+    pos = np.empty((size, 2 * n, 2))
+    pos[:, :n] = rng.uniform(config.team1_bounds[0], config.team1_bounds[1], (size, n, 2))
+    pos[:, n:] = rng.uniform(config.team2_bounds[0], config.team2_bounds[1], (size, n, 2))
+
+    flags = np.empty((size, 2, 2))
+    flags[:, 0] = rng.uniform(config.team1_bounds[0], config.team1_bounds[1], (size, 2))
+    flags[:, 1] = rng.uniform(config.team2_bounds[0], config.team2_bounds[1], (size, 2))
+
+    return pos, np.ones((size, 2 * n), dtype=bool), flags
+
+
+def _capture(pos, active, captured):
+    # Captured players are inactive and parked at the origin, as the engines do
+    active &= ~captured
+    pos[captured] = 0.0
+
+
+def uniform(config, size, rng):
+    return _uniform_starts(config, size, rng)
+
+
+def midline_flags(config, size, rng, band=0.1):
+    pos, active, flags = _uniform_starts(config, size, rng)
+
+    width, height = config.board_dims
+    middle = height / 2
+    flags[:, :, 0] = rng.uniform(0, width, (size, 2))
+    flags[:, 0, 1] = rng.uniform(middle - band * height, middle, size)
+    flags[:, 1, 1] = rng.uniform(middle, middle + band * height, size)
+
+    return pos, active, flags
+
+
+def outnumbered(config, size, rng, missing=1, team=1):
+    pos, active, flags = _uniform_starts(config, size, rng)
+
+    # `missing` distinct players of the team, chosen per scenario
+    n = config.team_size
+    order = np.argsort(rng.random((size, n)), axis=1)
+    captured = np.zeros((size, 2 * n), dtype=bool)
+    offset = 0 if team == 1 else n
+    np.put_along_axis(captured, order[:, :missing] + offset, True, axis=1)
+
+    _capture(pos, active, captured)
+    return pos, active, flags
+
+
+def pre_captured(config, size, rng, p=0.2):
+    pos, active, flags = _uniform_starts(config, size, rng)
+
+    n = config.team_size
+    captured = rng.random((size, 2 * n)) < p
+
+    # Spare one random player of any team that would start fully captured
+    for team in (slice(0, n), slice(n, 2 * n)):
+        wiped = captured[:, team].all(axis=1)
+        spared = rng.integers(0, n, size)
+        captured[:, team][wiped, spared[wiped]] = False
+
+    _capture(pos, active, captured)
+    return pos, active, flags
+
+
+SCENARIOS = {
+    "uniform": uniform,
+    "midline_flags": midline_flags,
+    "outnumbered": outnumbered,
+    "pre_captured": pre_captured,
+}
+
+
+def validate(config, pos, active, flags):
+    """
+    (M,) mask of the start states an episode can begin from: everything on the
+    board, captured players at the origin, at least one player per team and
+    no flag or player already inside a capture at step 0.
+    """
+    n = config.team_size
+    board = config.board_dims
+
+    valid = ((pos >= 0) & (pos <= board)).all(axis=(1, 2))
+    valid &= ((flags >= 0) & (flags <= board)).all(axis=(1, 2))
+    valid &= (active | (pos == 0).all(axis=2)).all(axis=1)
+    valid &= active[:, :n].any(axis=1) & active[:, n:].any(axis=1)
+
+    player_weight, flag_weight = interaction_weights(n)
+    flag_score, player_score = interaction_scores(pos, flags, player_weight, flag_weight, config.interaction_radius)
+    valid &= (flag_score >= 0).all(axis=1)
+    valid &= ((player_score >= 0) | ~active).all(axis=1)
+
+    return valid
+
+
+def difficulty(config, pos, active, flags):
+    """
+    (M,) difficulty for team 1 in [0, 1], see the module docstring.
+    """
+    n = config.team_size
+    diagonal = np.linalg.norm(config.board_dims)
+
+    def mean_distance(players, alive, flag):
+        d = np.linalg.norm(players - flag[:, None, :], axis=2) / diagonal
+        return (d * alive).sum(axis=1) / np.maximum(alive.sum(axis=1), 1)
+
+    attack = mean_distance(pos[:, :n], active[:, :n], flags[:, 1])
+    defend = 1.0 - mean_distance(pos[:, n:], active[:, n:], flags[:, 0])
+    numbers = (active[:, n:].sum(axis=1) - active[:, :n].sum(axis=1) + n) / (2 * n)
+
+    return np.clip((attack + defend + numbers) / 3, 0.0, 1.0)
+
+
+class ScenarioBank:
+    """
+    M start states: pos (M, 2 * team_size, 2), active (M, 2 * team_size),
+    flags (M, 2, 2) and their difficulty (M,).
+    """
+
+    def __init__(self, pos, active, flags, difficulty) -> None:
+        self.pos = np.asarray(pos, dtype=np.float64)
+        self.active = np.asarray(active, dtype=bool)
+        self.flags = np.asarray(flags, dtype=np.float64)
+        self.difficulty = np.asarray(difficulty, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.pos)
+
+    def starts(self, idx):
+        """
+        (pos, active, flags) of the scenarios at `idx`, for Game/BatchedGame.reset(start=...).
+        """
+        return self.pos[idx], self.active[idx], self.flags[idx]
+
+    def draw(self, k, rng):
+        """
+        k scenarios drawn uniformly.
+        """
+        return self.starts(rng.integers(0, len(self), k))
+
+    def record_result(self, winner):
+        pass
+
+    def subset(self, idx):
+        return ScenarioBank(self.pos[idx], self.active[idx], self.flags[idx], self.difficulty[idx])
+
+    @classmethod
+    def concatenate(cls, banks):
+        return cls(*(np.concatenate([getattr(b, name) for b in banks]) for name in ("pos", "active", "flags", "difficulty")))
+
+    def save(self, path):
+        np.savez(path, pos=self.pos, active=self.active, flags=self.flags, difficulty=self.difficulty)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["pos"], data["active"], data["flags"], data["difficulty"])
+
+
+def generate(config, size, scenario="uniform", seed=None, max_rounds=100, **kwargs):
+    """
+    ScenarioBank of `size` valid start states from a generator in SCENARIOS
+    (extra kwargs go to the generator). Invalid draws are replaced by drawing
+    more, a batch at a time.
+    """
+    if scenario not in SCENARIOS:
+        raise ValueError(f"Unknown scenario {scenario!r}, expected one of {list(SCENARIOS)}.")
+
+    rng = np.random.default_rng(seed)
+    batches, count = [], 0
+    for _ in range(max_rounds):
+        pos, active, flags = SCENARIOS[scenario](config, size, rng, **kwargs)
+        keep = validate(config, pos, active, flags)
+        batches.append((pos[keep], active[keep], flags[keep]))
+        count += int(keep.sum())
+        if count >= size:
+            break
+    else:
+        raise RuntimeError(f"Only {count} of {size} {scenario!r} scenarios were valid after {max_rounds} rounds.")
+
+    pos, active, flags = (np.concatenate(column)[:size] for column in zip(*batches))
+    return ScenarioBank(pos, active, flags, difficulty(config, pos, active, flags))
+
+
+class Curriculum:
+    """
+    Draws scenarios from a bank by difficulty, moving up a level once team 1
+    wins often enough.
+
+    The bank is split into `levels` equal-count difficulty bands. At level l
+    draws come from bands 0..l, half of them from band l itself. After each
+    `window` finished episodes the win rate is checked, and the level goes up
+    once it reaches `promote_at`.
+    """
+
+    def __init__(self, bank, levels=5, promote_at=0.6, window=200, level=0) -> None:
+        self.bank = bank
+        self.levels = levels
+        self.promote_at = promote_at
+        self.window = window
+        self.level = level
+
+        # Bank indices of each band, easiest first
+        order = np.argsort(bank.difficulty, kind="stable")
+        self.bands = np.array_split(order, levels)
+
+        self.games = 0
+        self.wins = 0
+
+    def draw(self, k, rng):
+        easier = np.concatenate(self.bands[:self.level + 1])
+        current = self.bands[self.level]
+        from_current = rng.random(k) < 0.5
+
+        idx = easier[rng.integers(0, len(easier), k)]
+        idx[from_current] = current[rng.integers(0, len(current), int(from_current.sum()))]
+        return self.bank.starts(idx)
+
+    def record_result(self, winner):
+        """
+        Record a finished episode; winner 1 is a team 1 win.
+        """
+        self.games += 1
+        self.wins += winner == 1
+
+        if self.games >= self.window:
+            if self.wins / self.games >= self.promote_at and self.level < self.levels - 1:
+                self.level += 1
+            self.games = self.wins = 0
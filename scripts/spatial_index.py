@@ -0,0 +1,99 @@
+import numpy as np
+
+# 3x3 block of cells around (and including) an agent's own cell
+NEIGHBOR_OFFSETS = np.array([[dx, dy] for dx in (-1, 0, 1) for dy in (-1, 0, 1)])
+
+
+class UniformGrid:
+    """
+    Uniform grid index over the players of one or more games.
+
+    Cells are at least `interaction_radius` wide, so every pair of players within
+    the radius sits in the same or an adjacent cell. Players are kept sorted by
+    cell key (game index folded in, so games never see each other). Since a
+    player moves at most one unit per step, few change cell and the previous
+    order is almost sorted already; update() only re-sorts when a cell changed,
+    using a stable sort that runs in close to linear time on presorted input.
+    """
+
+    def __init__(self, board_dims, interaction_radius) -> None:
+        self.cell_size = float(interaction_radius)
+        # Positions are clipped to [0, board_dims], so the far edge needs its own cell
+        self.grid_shape = np.floor(np.asarray(board_dims) / self.cell_size).astype(np.int64) + 1
+
+        self.cells = None
+        self.keys = None
+        self.order = None
+        self.sorted_keys = None
+
+    def _cells(self, pos):
+        return np.minimum(np.floor(pos / self.cell_size).astype(np.int64), self.grid_shape - 1)
+
+    def _keys(self, cells):
+        num_games = cells.shape[0]
+        game_offset = np.arange(num_games)[:, None] * (self.grid_shape[0] * self.grid_shape[1])
+        return game_offset + cells[..., 0] * self.grid_shape[1] + cells[..., 1]
+
+    def update(self, pos):
+        """
+        Re-index (G, P, 2) player positions.
+        """
+        cells = self._cells(pos)
+        keys = self._keys(cells).ravel()
+
+        if self.keys is None or self.keys.shape != keys.shape:
+            self.order = np.argsort(keys, kind="stable")
+        elif (keys != self.keys).any():
+            self.order = self.order[np.argsort(keys[self.order], kind="stable")]
+
+        self.cells = cells
+        self.keys = keys
+        self.sorted_keys = keys[self.order]
+
+    def candidate_pairs(self):
+        """
+        Flat (source, target) indices of every pair of players in the same or
+        adjacent cells, ordered by source.
+        """
+        num_games, num_players = self.cells.shape[:2]
+        cells = self.cells.reshape(-1, 1, 2) + NEIGHBOR_OFFSETS
+        valid = ((cells >= 0) & (cells < self.grid_shape)).all(axis=-1)
+
+        game = np.repeat(np.arange(num_games), num_players)[:, None]
+        keys = game * (self.grid_shape[0] * self.grid_shape[1]) + cells[..., 0] * self.grid_shape[1] + cells[..., 1]
+
+        start = np.searchsorted(self.sorted_keys, keys, side="left")
+        end = np.searchsorted(self.sorted_keys, keys, side="right")
+        counts = np.where(valid, end - start, 0).ravel()
+
+        # Expand each (player, cell) range [start, end) of the sorted order into pairs
+        source = np.repeat(np.repeat(np.arange(num_games * num_players), len(NEIGHBOR_OFFSETS)), counts)
+        first = np.cumsum(counts) - counts
+        position = np.arange(counts.sum()) - np.repeat(first, counts) + np.repeat(start.ravel(), counts)
+
+        return source, self.order[position]
+
+    def player_scores(self, pos, player_weight, interaction_radius):
+        """
+        Player scores of game.interaction_scores for (..., P, 2) positions, summing
+        only over pairs from adjacent cells.
+
+        Contributions are added per target in source order, so scores match the
+        dense kernel exactly.
+        """
+        batch_shape = pos.shape[:-1]
+        num_players = pos.shape[-2]
+        pos = pos.reshape(-1, num_players, 2)
+
+        self.update(pos)
+        source, target = self.candidate_pairs()
+
+        flat_pos = pos.reshape(-1, 2)
+        pair_dist = np.sqrt(np.sum((flat_pos[source] - flat_pos[target])**2, axis=-1))
+        close = pair_dist < interaction_radius
+        source, target, pair_dist = source[close], target[close], pair_dist[close]
+
+        player_score = np.zeros(len(flat_pos))
+        np.add.at(player_score, target, player_weight[source % num_players, target % num_players] * pair_dist)
+
+        return player_score.reshape(batch_shape)
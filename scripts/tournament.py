@@ -0,0 +1,209 @@
+"""
+Headless tournament between saved checkpoints.
+
+Every match is played as a batch of games on a BatchedGame, matches are spread
+over a process pool, and results are streamed into a results table as they
+finish. torch is only imported once a .zip checkpoint is loaded, so tournaments
+between exported .policy files never pay for it.
+Ratings are Elo-scale Bradley-Terry strengths fitted to all results.
+
+Run from the scripts directory:
+    python tournament.py models/team1/*.zip --mode round_robin --episodes 50 --out results.csv
+    python tournament.py models/team1/*.zip --mode gauntlet --cache ../logs/eval.sqlite
+"""
+import argparse
+import csv
+import itertools
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from batched_game import BatchedGame
+from league import PolicyCache
+from observations import make_encoder
+from opponent import OpponentPolicy, opponent_observation
+
+RESULT_DTYPE = np.dtype([
+    ("player", "U256"), ("opponent", "U256"),
+    ("wins", "i4"), ("losses", "i4"), ("draws", "i4"), ("timeouts", "i4"),
+])
+
+# Per-process policy cache, set up by _init_worker
+_policies = None
+
+
+def _init_worker(cache_bytes):
+    global _policies
+    _policies = PolicyCache(cache_bytes)
+
+    # One process per core already, keep torch (if a checkpoint loads it) from oversubscribing.
+    # Forked workers inherit an already initialized torch, which ignores the env var
+    os.environ["OMP_NUM_THREADS"] = "1"
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(1)
+
+
+def play_match(player_path, opponent_path, episodes, T=200, seed=None, config=None):
+    """
+    Play `episodes` games with `player_path` as team 1 against `opponent_path`
+    as team 2, all at once. Returns (wins, losses, draws, timeouts) for team 1.
+    """
+    policies = _policies if _policies is not None else PolicyCache()
+
+    # The game and encoder CTFVecEnv would use, without its stable-baselines3 base class (and torch)
+    game = BatchedGame(episodes, T=T, seed=seed, config=config)
+    encoder = make_encoder("flat", game.config)
+    models = policies.load(opponent_path), policies.load(player_path)
+    opponent, player = OpponentPolicy(models[0]), OpponentPolicy(models[1])
+
+    # Seed the policies' action sampling too (after loading, which draws from torch's RNG),
+    # so a match is reproducible for a seed
+    if seed is not None:
+        if "torch" in sys.modules:
+            sys.modules["torch"].manual_seed(int(np.random.default_rng(seed).integers(2**63)))
+        for model in models:
+            if hasattr(model, "rng"):
+                model.rng = np.random.default_rng(seed)
+
+    # One episode per game slot, finished games stay done
+    game.reset()
+    while not game.done.all():
+        obs = encoder.encode(game.moved, game.active, game.flags)
+        opponent_obs = opponent_observation(encoder, game.pos, game.active, game.flags, game.board_dims)
+
+        # Actions rescaled as in CTFVecEnv.step_wait
+        game.step((player.predict(obs) + 1) * np.pi, (opponent(opponent_obs) + 1) * np.pi)
+
+    winners = game.winner
+    return int((winners == 1).sum()), int((winners == 2).sum()), int((winners == 0).sum()), int((winners == -1).sum())
+
+
+def schedule(paths, mode="round_robin", challengers=None):
+    """
+    (player, opponent) pairings. "round_robin" plays every pair once with the
+    first checkpoint as team 1; "gauntlet" plays every challenger against every
+    other checkpoint (the newest checkpoint if no challengers are given).
+    """
+    if mode == "round_robin":
+        return list(itertools.combinations(paths, 2))
+    elif mode == "gauntlet":
+        challengers = challengers or paths[-1:]
+        return [(c, p) for c in challengers for p in paths if p != c]
+
+    raise ValueError(f"Unknown mode {mode!r}, expected 'round_robin' or 'gauntlet'.")
+
+
+def run_tournament(paths, mode="round_robin", episodes=50, workers=None, T=200, seed=0, challengers=None,
+                   out=None, cache_bytes=512 * 2**20, cache=None):
+    """
+    Play all pairings across a process pool. Rows are appended to the CSV at
+    `out` as matches complete. Returns the results table as a structured array.
+
+    With `cache` (an eval_cache.EvalCache database path) every match uses
+    `seed` itself, so a pairing has the same key in every tournament, and
+    only pairings missing from the cache are played.
+    """
+    pairings = schedule(paths, mode, challengers)
+
+    if cache is not None:
+        from eval_cache import EvalCache
+
+        with EvalCache(cache) as results_cache:
+            results = results_cache.evaluate([(player, opponent, seed) for player, opponent in pairings], episodes, T,
+                                             workers=workers, cache_bytes=cache_bytes)
+            print(f"{results_cache.hits} cached, {results_cache.misses} played")
+
+        if out is not None:
+            with open(out, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(RESULT_DTYPE.names)
+                writer.writerows(results.tolist())
+        return results
+
+    seeds = np.random.SeedSequence(seed).spawn(len(pairings))
+    rows = []
+
+    writer = None
+    if out is not None:
+        f = open(out, "w", newline="")
+        writer = csv.writer(f)
+        writer.writerow(RESULT_DTYPE.names)
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(cache_bytes,)) as pool:
+        futures = {
+            pool.submit(play_match, player, opponent, episodes, T, match_seed): (player, opponent)
+            for (player, opponent), match_seed in zip(pairings, seeds)
+        }
+        for future in as_completed(futures):
+            row = futures[future] + future.result()
+            rows.append(row)
+            print(f"{os.path.basename(row[0])} vs {os.path.basename(row[1])}: {row[2]}W {row[3]}L {row[4]}D {row[5]}T")
+
+            if writer is not None:
+                writer.writerow(row)
+                f.flush()
+
+    if writer is not None:
+        f.close()
+
+    return np.array(rows, dtype=RESULT_DTYPE)
+
+
+def elo_ratings(results, prior_games=1.0, iterations=500):
+    """
+    Elo-scale ratings (mean 1500) from a results table.
+
+    Fits Bradley-Terry strengths by minorization-maximization, counting draws
+    and timeouts as half a win. Every played pair also gets `prior_games` drawn
+    games so unbeaten or winless players keep a finite rating.
+    """
+    names = sorted(set(results["player"]) | set(results["opponent"]))
+    index = {name: i for i, name in enumerate(names)}
+    n = len(names)
+
+    wins = np.zeros((n, n))
+    games = np.zeros((n, n))
+    for row in results:
+        i, j = index[row["player"]], index[row["opponent"]]
+        played = row["wins"] + row["losses"] + row["draws"] + row["timeouts"]
+        half = 0.5 * (row["draws"] + row["timeouts"] + prior_games)
+
+        wins[i, j] += row["wins"] + half
+        wins[j, i] += row["losses"] + half
+        games[i, j] += played + prior_games
+        games[j, i] += played + prior_games
+
+    strength = np.ones(n)
+    for _ in range(iterations):
+        strength = wins.sum(axis=1) / (games / (strength[:, None] + strength[None, :])).sum(axis=1)
+        strength /= np.exp(np.log(strength).mean())
+
+    return dict(zip(names, 1500 + 400 * np.log10(strength)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("checkpoints", nargs="+")
+    parser.add_argument("--mode", choices=["round_robin", "gauntlet"], default="round_robin")
+    parser.add_argument("--challengers", nargs="*", help="Challengers for gauntlet mode")
+    parser.add_argument("--episodes", type=int, default=50, help="Games per pairing")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--T", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="CSV file results are streamed to")
+    parser.add_argument("--cache", help="SQLite results cache (eval_cache.py), only missing pairings are played")
+    args = parser.parse_args()
+
+    results = run_tournament(
+        args.checkpoints, args.mode, args.episodes, args.workers, args.T, args.seed, args.challengers, args.out,
+        cache=args.cache
+    )
+
+    ratings = elo_ratings(results)
+    print(f"\n{'checkpoint':<40} {'elo':>7}")
+    for name, rating in sorted(ratings.items(), key=lambda item: -item[1]):
+        print(f"{os.path.basename(name):<40} {rating:>7.0f}")
+
+
+if __name__ == "__main__":
+    main()
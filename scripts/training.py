@@ -1,10 +1,11 @@
 import os
 from stable_baselines3 import PPO
 from stable_baselines3.common.env_util import make_vec_env
-from stable_baselines3.common.callbacks import CheckpointCallback
-import vidmaker
-import pygame
+from stable_baselines3.common.callbacks import CallbackList, CheckpointCallback
 import numpy as np
+from callbacks import EpisodeMetricsCallback, RenderCallback, ThroughputCallback
+from league import CheckpointIndex, League, PolicyCache
+from video import VideoWriter
 
 def train_agent(env, agent_name, save_dir, total_timesteps, epoch, model=None, render_interval=100):
     """
@@ -13,16 +14,19 @@ def train_agent(env, agent_name, save_dir, total_timesteps, epoch, model=None, r
     if model is None:
         model = PPO("MlpPolicy", env, verbose=1)
 
-    checkpoint_callback = CheckpointCallback(save_freq=10000, save_path=save_dir, name_prefix=agent_name)
+    # Checkpointing, rendering and metrics run on a schedule inside a single learn() call
+    callbacks = [
+        CheckpointCallback(save_freq=10000, save_path=save_dir, name_prefix=agent_name),
+        EpisodeMetricsCallback(),
+        ThroughputCallback(),
+    ]
+
+    # Render the environment every `render_interval` timesteps, None to train headless
+    if render_interval:
+        callbacks.append(RenderCallback(render_interval))
 
     # Train the model
-    # Train the model
-    for timestep in range(total_timesteps):
-        model.learn(total_timesteps=1, reset_num_timesteps=False, callback=checkpoint_callback)
-        
-        # Render the environment every `render_interval` timesteps
-        if timestep % render_interval == 0:
-            env.render()
+    model.learn(total_timesteps=total_timesteps, reset_num_timesteps=False, callback=CallbackList(callbacks))
 
     save_path = os.path.join(save_dir, f"{agent_name}_epoch_{epoch}.zip")
     model.save(save_path)
@@ -30,9 +34,12 @@ def train_agent(env, agent_name, save_dir, total_timesteps, epoch, model=None, r
 
     return model
 
-def self_play_training(env, save_dir, total_timesteps, self_play_epochs):
+def self_play_training(env, save_dir, total_timesteps, self_play_epochs, opponent_strategy="latest", cache_bytes=512 * 2**20):
     """
     Perform self-play trianing for two agents
+
+    From the second epoch on, team 2 is drawn every episode from the league of
+    saved team 1 checkpoints ("latest", "uniform" or "prioritized" by win rate).
     """
 
     team1_dir = os.path.join(save_dir, "team1")
@@ -42,6 +49,8 @@ def self_play_training(env, save_dir, total_timesteps, self_play_epochs):
     os.makedirs(team1_dir, exist_ok=True)
     os.makedirs(team2_dir, exist_ok=True)
 
+    league = League(CheckpointIndex(team1_dir, prefix="team1"), PolicyCache(cache_bytes), strategy=opponent_strategy)
+
     model_team1 = None
 
     for epoch in range(self_play_epochs):
@@ -49,16 +58,13 @@ def self_play_training(env, save_dir, total_timesteps, self_play_epochs):
 
         if epoch == 0:
             print("Using stationary Team 2 for initial training")
-            env.set_opponent_policy("stationary", None)
+            env.unwrapped.set_opponent_policy("stationary", None)
+        elif league.index.refresh():
+            print(f"Sampling team 2 from {len(league.index)} team 1 checkpoints ({opponent_strategy})")
+            env.unwrapped.set_opponent_policy("league", league)
         else:
-            print("Setting team 2's policy to previously trained team 1 policy")
-            prev_policy = os.path.join(team1_dir, f"team1_epoch_{epoch - 1}.zip")
-
-            if os.path.exists(prev_policy):
-                env.set_opponent_policy("learned", PPO.load(prev_policy))
-            else:
-                print(f"Warning: Previous policy {prev_policy} not found. Using stationary opponent instead.")
-                env.set_opponent_policy("stationary", None)
+            print(f"Warning: No team 1 checkpoints in {team1_dir}. Using stationary opponent instead.")
+            env.unwrapped.set_opponent_policy("stationary", None)
 
         # Train Team 1
         print("Training Team 1...")
@@ -68,32 +74,69 @@ def self_play_training(env, save_dir, total_timesteps, self_play_epochs):
     print("Self play training complete")
 
 
+def async_self_play_training(save_dir, total_timesteps, num_actors=None, envs_per_actor=16, n_steps=128, config=None,
+                             seed=None, **kwargs):
+    """
+    Self-play with actor processes generating rollouts while the learner trains
+    (actor_learner.ActorLearner), instead of alternating blocks of play and training.
+    Checkpoints go to save_dir/team1 like self_play_training.
+    """
+    from actor_learner import ActorLearner
+    from vec_env import CTFVecEnv
+
+    team1_dir = os.path.join(save_dir, "team1")
+    os.makedirs(team1_dir, exist_ok=True)
+
+    # Only provides the spaces and the rollout buffer size, the actors step their own games
+    model = PPO("MlpPolicy", CTFVecEnv(envs_per_actor, config=config), n_steps=n_steps, verbose=1, seed=seed)
+
+    with ActorLearner(model, num_actors=num_actors, config=config, seed=seed, save_dir=team1_dir, **kwargs) as runner:
+        runner.learn(total_timesteps)
+        print(f"team1 policy saved to {runner.save()}")
+
+    return model
+
+
 def validation(env, num_episodes, team1_model, opponent_model, model1, model2, frequency=20):
+    """
+    Play `num_episodes` episodes and return the winners. Every `frequency`-th
+    episode is streamed to an mp4 in ../videos. Without render_mode="rgb_array"
+    or "human" the frames are drawn offscreen.
+    """
     wins =  []
 
     for episode in range(num_episodes):
-        if episode % frequency == 0:
-            video = vidmaker.Video(f"../videos/episode_{episode}_{model1}vs{model2}.mp4", late_export=True)
+        recording = episode % frequency == 0
+        if recording:
+            video = VideoWriter(f"../videos/episode_{episode}_{model1}vs{model2}.mp4", fps=env.metadata["render_fps"])
 
-        env.set_opponent_policy("learned", opponent_model)
+        env.unwrapped.set_opponent_policy("learned", opponent_model)
 
         obs, info = env.reset()
 
         done = False
         while not done:
-            env.render()
-
-            if episode % frequency == 0:
-                video.update(pygame.surfarray.pixels3d(env.game.screen).swapaxes(0, 1), inverted=False) 
+            frame = env.render()
+
+            if recording:
+                if frame is None:
+                    game = env.unwrapped.game
+                    # "human" has drawn the window, render_mode=None nothing, so draw offscreen
+                    if env.unwrapped.render_mode is None:
+                        if game.renderer is None:
+                            game.attach_renderer(offscreen=True)
+                        game.renderer.draw()
+                    frame = game.renderer.frame()
+                video.write(frame)
 
             act = team1_model.predict(obs)[0]
             obs, reward, done, trunc, info = env.step(act)
 
             if done:
-                wins.append(info)
+                wins.append(info["winner"])
 
 
-        if episode % frequency == 0:
-            video.export(verbose=True)
+        if recording:
+            video.close()
 
     return wins
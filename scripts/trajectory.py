@@ -0,0 +1,274 @@
+"""
+Compact trajectory logs and replay.
+
+A log is a directory of append-only columns, one raw binary file per field
+(pos.bin, flags.bin, active.bin, actions.bin, rewards.bin), plus an episode
+index (episodes.bin) and meta.json with the game config the log was recorded
+with (team size, board, interaction radius and team bounds) and the env's
+action_repeat. Episodes are written as
+contiguous row blocks once they finish, so the reader can memory-map every
+column and slice any episode out without loading the rest.
+
+Each row is the game state after an env step; row 0 of an episode is the
+state right after reset (zero rewards, NaN actions). A stationary team logs NaN
+actions. With action_repeat > 1 an env step is one decision, up to
+action_repeat game steps with the same actions, and its row holds the state
+after the last of them and the rewards summed over them.
+
+Replay an episode from the scripts directory:
+    python trajectory.py logs/run1 --list
+    python trajectory.py logs/run1 --episode 12 --video ../videos/replay_12.mp4
+"""
+import argparse
+import json
+import os
+import numpy as np
+
+EPISODE_DTYPE = np.dtype([("start", "i8"), ("length", "i4"), ("winner", "i1")])
+
+
+def _columns(team_size):
+    # name -> (dtype, per-row shape)
+    return {
+        "pos": (np.float32, (2 * team_size, 2)),
+        "flags": (np.float32, (2, 2)),
+        "active": (np.bool_, (2 * team_size,)),
+        "actions": (np.float32, (2 * team_size,)),
+        "rewards": (np.float32, (2,)),
+    }
+
+
+def _config_meta(config, action_repeat=1):
+    # GameConfig keyword arguments and the env's action repeat, as stored in meta.json
+    return json.loads(json.dumps({
+        "team_size": config.team_size,
+        "board_dims": config.board_dims.tolist(),
+        "interaction_radius": config.interaction_radius,
+        "team1_bounds": config.team1_bounds.tolist(),
+        "team2_bounds": config.team2_bounds.tolist(),
+        "action_repeat": action_repeat,
+    }))
+
+
+def _load_meta(path):
+    # Logs from before the full config was stored only have team_size,
+    # logs from before action repeat were recorded one game step per row
+    with open(path) as f:
+        return {"action_repeat": 1, **json.load(f)}
+
+
+class TrajectoryWriter:
+    """
+    Records episodes from `num_envs` games of `config` stepped in lockstep.
+
+    Each env has an in-memory buffer of up to T + 1 rows per column, filled with
+    one vectorized write per step. When an env's episode ends its rows are
+    appended to the column files and a row is added to the episode index.
+    set_trajectory_writer on CTFEnv/CTFVecEnv sizes the buffers for the env's T
+    and checks its action_repeat.
+    """
+
+    def __init__(self, directory, num_envs=1, config=None, T=200, action_repeat=1) -> None:
+        if config is None:
+            from game import GameConfig
+            config = GameConfig()
+
+        self.directory = directory
+        self.num_envs = num_envs
+        self.meta = _config_meta(config, action_repeat)
+        self.columns = _columns(config.team_size)
+        os.makedirs(directory, exist_ok=True)
+
+        meta_path = os.path.join(directory, "meta.json")
+        if os.path.exists(meta_path):
+            if _load_meta(meta_path) != self.meta:
+                raise ValueError(f"{directory} holds trajectories for a different game config or action_repeat.")
+        else:
+            with open(meta_path, "w") as f:
+                json.dump(self.meta, f)
+
+        self.buffers = {
+            name: np.zeros((num_envs, T + 1) + shape, dtype=dtype) for name, (dtype, shape) in self.columns.items()
+        }
+        self.lengths = np.zeros(num_envs, dtype=np.int64)
+        self.env_idx = np.arange(num_envs)
+
+        self.files = {name: open(os.path.join(directory, f"{name}.bin"), "ab") for name in self.columns}
+        self.episode_file = open(os.path.join(directory, "episodes.bin"), "ab")
+        self.num_rows = os.path.getsize(os.path.join(directory, "pos.bin")) // (
+            np.dtype(self.columns["pos"][0]).itemsize * int(np.prod(self.columns["pos"][1]))
+        )
+
+    def fit(self, num_envs, T, config, action_repeat=1):
+        """
+        Check that an env matches this writer and grow the buffers to hold its
+        episodes of up to T steps.
+        """
+        if num_envs != self.num_envs:
+            raise ValueError(f"Writer records {self.num_envs} envs, the env has {num_envs}.")
+        if _config_meta(config, action_repeat) != self.meta:
+            raise ValueError(f"{self.directory} holds trajectories for a different game config or action_repeat.")
+
+        if T + 1 > self.buffers["pos"].shape[1]:
+            for name, buffer in self.buffers.items():
+                grown = np.zeros((self.num_envs, T + 1) + buffer.shape[2:], dtype=buffer.dtype)
+                grown[:, :buffer.shape[1]] = buffer
+                self.buffers[name] = grown
+
+    def begin_episodes(self, mask, pos, flags, active):
+        """
+        Start new episodes for the envs in `mask` from their post-reset state.
+        Any unfinished episode in those envs is dropped.
+        """
+        idx = np.flatnonzero(mask)
+        self.lengths[idx] = 0
+        self._write(idx, pos[idx], flags[idx], active[idx], np.nan, 0.0)
+
+    def record(self, pos, flags, active, actions, rewards):
+        """
+        Append the post-step state of every env, all arguments are (num_envs, ...).
+        """
+        self._write(self.env_idx, pos, flags, active, actions, rewards)
+
+    def _write(self, idx, pos, flags, active, actions, rewards):
+        row = self.lengths[idx]
+        full = row >= self.buffers["pos"].shape[1]
+        if full.any():
+            raise ValueError(f"Episode in env {idx[full][0]} is longer than the {self.buffers['pos'].shape[1]} rows "
+                             "buffered, create the writer with the env's T or attach it with set_trajectory_writer.")
+
+        for name, value in (("pos", pos), ("flags", flags), ("active", active), ("actions", actions), ("rewards", rewards)):
+            self.buffers[name][idx, row] = np.broadcast_to(value, (len(idx),) + self.columns[name][1])
+
+        self.lengths[idx] += 1
+
+    def end_episodes(self, mask, winners):
+        """
+        Write out the finished episodes of the envs in `mask`.
+        """
+        for i in np.flatnonzero(mask):
+            length = int(self.lengths[i])
+            if length == 0:
+                continue
+
+            for name, f in self.files.items():
+                f.write(self.buffers[name][i, :length].tobytes())
+
+            episode = np.array([(self.num_rows, length, winners[i])], dtype=EPISODE_DTYPE)
+            self.episode_file.write(episode.tobytes())
+
+            self.num_rows += length
+            self.lengths[i] = 0
+
+    def flush(self):
+        for f in self.files.values():
+            f.flush()
+        self.episode_file.flush()
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+        self.episode_file.close()
+
+
+class TrajectoryReader:
+    """
+    Memory-mapped view of a trajectory log.
+    """
+
+    def __init__(self, directory) -> None:
+        self.directory = directory
+        self.meta = _load_meta(os.path.join(directory, "meta.json"))
+        self.team_size = self.meta["team_size"]
+        self.action_repeat = self.meta["action_repeat"]
+
+        self.episodes = self._map("episodes", EPISODE_DTYPE, ())
+        self.columns = {name: self._map(name, dtype, shape) for name, (dtype, shape) in _columns(self.team_size).items()}
+
+    def _map(self, name, dtype, shape):
+        path = os.path.join(self.directory, f"{name}.bin")
+        row_bytes = np.dtype(dtype).itemsize * int(np.prod(shape))
+        rows = os.path.getsize(path) // row_bytes if os.path.exists(path) else 0
+        if rows == 0:
+            return np.zeros((0,) + shape, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r", shape=(rows,) + shape)
+
+    def __len__(self):
+        return len(self.episodes)
+
+    def episode(self, i):
+        """
+        Dict of column views for episode i, each (length, ...).
+        """
+        start, length = int(self.episodes[i]["start"]), int(self.episodes[i]["length"])
+        return {name: column[start:start + length] for name, column in self.columns.items()}
+
+    def find(self, winner=None, min_length=0, max_length=None):
+        """
+        Indices of episodes matching a winner and a length range.
+        """
+        mask = self.episodes["length"] >= min_length
+        if max_length is not None:
+            mask &= self.episodes["length"] <= max_length
+        if winner is not None:
+            mask &= self.episodes["winner"] == winner
+        return np.flatnonzero(mask)
+
+
+def replay(reader, i, video_path=None, fps=30, team_sprite_path=None, team_flag_path=None):
+    """
+    Re-render episode i, in a window or offscreen into an mp4 at `video_path`.
+    """
+    from game import Game, GameConfig
+
+    team_sprite_path = team_sprite_path or ["../images/team1.png", "../images/team2.png"]
+    team_flag_path = team_flag_path or ["../images/flag1.png", "../images/flag2.png"]
+
+    config = {key: value for key, value in reader.meta.items() if key != "action_repeat"}
+    game = Game(team_sprite_path, team_flag_path, config=GameConfig(**config))
+    game.reset()
+    renderer = game.attach_renderer(render_fps=None if video_path else fps, offscreen=video_path is not None)
+
+    video = None
+    if video_path is not None:
+        from video import VideoWriter
+        video = VideoWriter(video_path, fps=fps)
+
+    episode = reader.episode(i)
+    players = game.team1.players + game.team2.players
+    for pos, flags, active in zip(episode["pos"], episode["flags"], episode["active"]):
+        for player, p, a in zip(players, pos, active):
+            player.set_pos(p)
+            player.active = bool(a)
+        game.team1.flag_pos[:], game.team2.flag_pos[:] = flags
+
+        renderer.draw()
+        if video is not None:
+            video.write(renderer.frame())
+
+    if video is not None:
+        video.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory")
+    parser.add_argument("--list", action="store_true", help="List the logged episodes")
+    parser.add_argument("--episode", type=int, default=0)
+    parser.add_argument("--video", help="Write the replay to this mp4 instead of opening a window")
+    parser.add_argument("--fps", type=int, default=30)
+    args = parser.parse_args()
+
+    reader = TrajectoryReader(args.directory)
+
+    if args.list:
+        print(f"{'episode':>8} {'start':>10} {'length':>7} {'winner':>7}")
+        for i, (start, length, winner) in enumerate(reader.episodes):
+            print(f"{i:>8} {start:>10} {length:>7} {winner:>7}")
+        return
+
+    replay(reader, args.episode, args.video, args.fps)
+
+
+if __name__ == "__main__":
+    main()
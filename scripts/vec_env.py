@@ -0,0 +1,424 @@
+import multiprocessing
+import os
+import numpy as np
+from gymnasium import spaces
+from stable_baselines3.common.vec_env import VecEnv
+from batched_game import BatchedGame
+from game import GameConfig
+from observations import make_encoder
+from opponent import OpponentPolicy, flip_action, opponent_observation
+
+
+class CTFVecEnv(VecEnv):
+    """
+    Vectorized Capture the Flag environment backed by BatchedGame.
+
+    Every step advances all `num_envs` games in one call. Observations, rewards
+    and opponent policies follow CTFEnv, and finished games are reset automatically
+    with the last observation stored in info["terminal_observation"].
+    """
+
+    metadata = {"render_modes": []}
+
+    def __init__(self, num_envs, T=200, seed=None, config=None, obs_encoder="flat", action_repeat=1, stop_on_capture=True):
+        self.game = BatchedGame(num_envs, T=T, seed=seed, config=config)
+        config = self.game.config
+
+        # observations.py encoder, a name or an instance
+        self.obs_encoder = make_encoder(obs_encoder, config)
+        observation_space = self.obs_encoder.space
+
+        # Angles for team members (scaled)
+        action_space = spaces.Box(low=-1, high=1, shape=(config.team_size,), dtype=np.float32)
+
+        super().__init__(num_envs, observation_space, action_space)
+
+        self.opponent_policy = "stationary"
+        self.opponent_model = None
+        self.opponent_actions = None
+        self.actions = None
+        self.trajectory_writer = None
+        self.scenarios = None
+
+        # Action repeat as in CTFEnv, see BatchedGame.step_repeat
+        if action_repeat < 1:
+            raise ValueError(f"action_repeat must be at least 1, got {action_repeat!r}.")
+        self.action_repeat = action_repeat
+        self.stop_on_capture = stop_on_capture
+
+    def rescale_action(self, action):
+        # Rescale action from [-1, 1] to [0, 2π]
+        if action is not None:
+            return (action + 1) * np.pi
+        else:
+            return None
+
+    def set_opponent_policy(self, policy_type, model=None):
+        self.opponent_policy = policy_type
+        self.opponent_model = OpponentPolicy(model) if model is not None else None
+
+    def set_scenarios(self, scenarios):
+        """
+        Start games from a scenarios.ScenarioBank or Curriculum (None for uniform starts), see CTFEnv.set_scenarios.
+        """
+        self.scenarios = scenarios
+
+    def _reset_games(self, mask=None):
+        if self.scenarios is None:
+            self.game.reset(mask)
+        else:
+            k = self.num_envs if mask is None else int(mask.sum())
+            self.game.reset(mask, start=self.scenarios.draw(k, self.game.rng))
+
+    def set_trajectory_writer(self, writer):
+        """
+        Log every episode to a trajectory.TrajectoryWriter with num_envs envs (None to stop).
+        """
+        if writer is not None:
+            writer.fit(self.num_envs, self.game.T, self.game.config, self.action_repeat)
+        self.trajectory_writer = writer
+
+    def set_metrics(self, metrics):
+        """
+        Record engine metrics into a metrics.Metrics (None to disable).
+        """
+        self.game.metrics = metrics
+
+    def opponent_obs(self, out=None):
+        """
+        (num_envs, *obs_encoder.shape) observations from team 2's perspective.
+        """
+        return opponent_observation(self.obs_encoder, self.game.pos, self.game.active, self.game.flags,
+                                    self.game.board_dims, out=out)
+
+    def _get_opponent_action(self):
+        """
+        Generate actions for every opponent team based on the current policy.
+
+        "external" uses `opponent_actions` as set by the caller, which is how
+        SubprocCTFVecEnv batches one learned opponent across all workers.
+        """
+        if self.opponent_policy == "stationary":
+            return None  # No movement
+        elif self.opponent_policy == "random":
+            return self.game.rng.uniform(0, 2 * np.pi, (self.num_envs, self.game.team_size))
+        elif self.opponent_policy == "learned" and self.opponent_model:
+            return self.opponent_model(self.opponent_obs())
+        elif self.opponent_policy == "external":
+            return self.opponent_actions
+
+    def _get_obs(self, mask=None):
+        # Encode the positions of the last step/reset, for the games in `mask` only if given
+        if mask is None:
+            return self.obs_encoder.encode(self.game.moved, self.game.active, self.game.flags)
+        return self.obs_encoder.encode(self.game.moved[mask], self.game.active[mask], self.game.flags[mask])
+
+    def reset(self):
+        self._reset_games()
+
+        obs = self._get_obs()
+        self.reset_infos = [{} for _ in range(self.num_envs)]
+
+        if self.trajectory_writer is not None:
+            self.trajectory_writer.begin_episodes(np.ones(self.num_envs, dtype=bool), self.game.pos, self.game.flags, self.game.active)
+
+        return obs
+
+    def step_async(self, actions):
+        self.actions = actions
+
+    def step_wait(self):
+        team1_action = self.rescale_action(self.actions)
+        team2_action = self.rescale_action(self._get_opponent_action())
+
+        if self.action_repeat == 1:
+            done, _, _, team1_reward, team2_reward = self.game.step(team1_action, team2_action)
+        else:
+            done, _, _, team1_reward, team2_reward, _ = self.game.step_repeat(
+                team1_action, team2_action, self.action_repeat, self.stop_on_capture
+            )
+
+        obs = self._get_obs()
+        rewards = team1_reward.astype(np.float32)
+        infos = [{} for _ in range(self.num_envs)]
+
+        if self.trajectory_writer is not None:
+            actions = np.concatenate([
+                np.full((self.num_envs, self.game.team_size), np.nan) if a is None else a for a in (team1_action, team2_action)
+            ], axis=1)
+            self.trajectory_writer.record(self.game.pos, self.game.flags, self.game.active, actions, self.game.rewards)
+            self.trajectory_writer.end_episodes(done, self.game.winner)
+
+        if done.any():
+            for i in np.flatnonzero(done):
+                infos[i]["winner"] = int(self.game.winner[i])
+                infos[i]["terminal_observation"] = obs[i].copy()
+                if self.scenarios is not None:
+                    self.scenarios.record_result(infos[i]["winner"])
+
+            self._reset_games(done)
+            obs[done] = self._get_obs(done)
+
+            if self.trajectory_writer is not None:
+                self.trajectory_writer.begin_episodes(done, self.game.pos, self.game.flags, self.game.active)
+
+        return obs, rewards, done, infos
+
+    def seed(self, seed=None):
+        self.game.rng = np.random.default_rng(seed)
+        return [seed for _ in range(self.num_envs)]
+
+    def close(self):
+        pass
+
+    def _indices(self, indices):
+        if indices is None:
+            return range(self.num_envs)
+        elif isinstance(indices, int):
+            return [indices]
+        return indices
+
+    def get_attr(self, attr_name, indices=None):
+        return [getattr(self, attr_name) for _ in self._indices(indices)]
+
+    def set_attr(self, attr_name, value, indices=None):
+        # Attributes belong to the whole batch, there is no per-env object to set them on
+        if sorted(self._indices(indices)) != list(range(self.num_envs)):
+            raise ValueError("CTFVecEnv.set_attr can only set an attribute on all envs at once.")
+        setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        result = getattr(self, method_name)(*method_args, **method_kwargs)
+        return [result for _ in self._indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._indices(indices)]
+
+
+def _shared_array(ctype, shape):
+    return multiprocessing.RawArray(ctype, int(np.prod(shape))), shape
+
+
+def _as_array(buffer, dtype, start=None, stop=None):
+    array = np.frombuffer(buffer[0], dtype=dtype).reshape(buffer[1])
+    return array[start:stop]
+
+
+def _worker(remote, parent_remote, buffers, start, stop, T, seed, config, obs_encoder, action_repeat, stop_on_capture):
+    parent_remote.close()
+
+    env = CTFVecEnv(stop - start, T=T, seed=seed, config=config, obs_encoder=obs_encoder, action_repeat=action_repeat,
+                    stop_on_capture=stop_on_capture)
+
+    # Views of this worker's rows in the shared buffers
+    obs = _as_array(buffers["obs"], np.float32, start, stop)
+    actions = _as_array(buffers["actions"], np.float32, start, stop)
+    rewards = _as_array(buffers["rewards"], np.float32, start, stop)
+    dones = _as_array(buffers["dones"], np.bool_, start, stop)
+    winners = _as_array(buffers["winners"], np.int64, start, stop)
+    terminal_obs = _as_array(buffers["terminal_obs"], np.float32, start, stop)
+    opponent_obs = _as_array(buffers["opponent_obs"], np.float32, start, stop)
+    env.opponent_actions = _as_array(buffers["opponent_actions"], np.float64, start, stop)
+
+    try:
+        while True:
+            cmd, data = remote.recv()
+            if cmd == "step":
+                env.step_async(actions)
+                obs[:], rewards[:], dones[:], infos = env.step_wait()
+                for i in np.flatnonzero(dones):
+                    winners[i] = infos[i]["winner"]
+                    terminal_obs[i] = infos[i]["terminal_observation"]
+                env.opponent_obs(out=opponent_obs)
+                remote.send(None)
+            elif cmd == "reset":
+                obs[:] = env.reset()
+                env.opponent_obs(out=opponent_obs)
+                remote.send(None)
+            elif cmd == "seed":
+                remote.send(env.seed(data))
+            elif cmd == "env_method":
+                method_name, indices, args, kwargs = data
+                remote.send(env.env_method(method_name, *args, indices=indices, **kwargs))
+            elif cmd == "get_attr":
+                attr_name, indices = data
+                remote.send(env.get_attr(attr_name, indices))
+            elif cmd == "set_attr":
+                attr_name, value, indices = data
+                remote.send(env.set_attr(attr_name, value, indices))
+            elif cmd == "close":
+                remote.close()
+                break
+            else:
+                raise NotImplementedError(f"`{cmd}` is not implemented in the worker")
+    except KeyboardInterrupt:
+        pass
+
+
+class SubprocCTFVecEnv(VecEnv):
+    """
+    Runs `num_envs` Capture the Flag games split across worker processes, each
+    stepping its share of the games with a CTFVecEnv.
+
+    Actions, observations, rewards, dones and terminal observations go through
+    shared-memory buffers; the pipes only carry short commands. Worker i is
+    seeded with the i-th child of SeedSequence(seed), so a run is reproducible
+    for a given seed and worker count. Finished games reset automatically.
+
+    A learned opponent set with set_opponent_policy stays in this process: the
+    workers publish team 2's observations and the opponent is evaluated in one
+    batched forward pass over all envs per step.
+    """
+
+    def __init__(self, num_envs, num_workers=None, T=200, seed=None, config=None, start_method=None, obs_encoder="flat",
+                 action_repeat=1, stop_on_capture=True):
+        if action_repeat < 1:
+            raise ValueError(f"action_repeat must be at least 1, got {action_repeat!r}.")
+        if num_workers is None:
+            num_workers = os.cpu_count()
+        num_workers = max(1, min(num_workers, num_envs))
+
+        if config is None:
+            config = GameConfig()
+
+        obs_encoder = make_encoder(obs_encoder, config)
+        obs_shape = (num_envs,) + obs_encoder.shape
+        action_space = spaces.Box(low=-1, high=1, shape=(config.team_size,), dtype=np.float32)
+
+        super().__init__(num_envs, obs_encoder.space, action_space)
+
+        self.buffers = {
+            "obs": _shared_array("f", obs_shape),
+            "actions": _shared_array("f", (num_envs, config.team_size)),
+            "rewards": _shared_array("f", (num_envs,)),
+            "dones": _shared_array("b", (num_envs,)),
+            "winners": _shared_array("q", (num_envs,)),
+            "terminal_obs": _shared_array("f", obs_shape),
+            "opponent_obs": _shared_array("f", obs_shape),
+            "opponent_actions": _shared_array("d", (num_envs, config.team_size)),
+        }
+        self.obs = _as_array(self.buffers["obs"], np.float32)
+        self.actions = _as_array(self.buffers["actions"], np.float32)
+        self.rewards = _as_array(self.buffers["rewards"], np.float32)
+        self.dones = _as_array(self.buffers["dones"], np.bool_)
+        self.winners = _as_array(self.buffers["winners"], np.int64)
+        self.terminal_obs = _as_array(self.buffers["terminal_obs"], np.float32)
+        self.opponent_obs = _as_array(self.buffers["opponent_obs"], np.float32)
+        self.opponent_actions = _as_array(self.buffers["opponent_actions"], np.float64)
+        self.opponent_model = None
+
+        # Contiguous block of envs per worker
+        bounds = np.linspace(0, num_envs, num_workers + 1).astype(int)
+        self.slices = list(zip(bounds[:-1], bounds[1:]))
+        seeds = np.random.SeedSequence(seed).spawn(num_workers)
+
+        ctx = multiprocessing.get_context(start_method)
+        self.remotes, self.work_remotes = zip(*[ctx.Pipe() for _ in range(num_workers)])
+        self.processes = []
+        for work_remote, remote, (start, stop), worker_seed in zip(self.work_remotes, self.remotes, self.slices, seeds):
+            args = (work_remote, remote, self.buffers, start, stop, T, worker_seed, config, obs_encoder, action_repeat,
+                    stop_on_capture)
+            process = ctx.Process(target=_worker, args=args, daemon=True)
+            process.start()
+            self.processes.append(process)
+            work_remote.close()
+
+        self.waiting = False
+        self.closed = False
+
+    def reset(self):
+        for remote in self.remotes:
+            remote.send(("reset", None))
+        for remote in self.remotes:
+            remote.recv()
+
+        self.reset_infos = [{} for _ in range(self.num_envs)]
+        return self.obs.copy()
+
+    def set_opponent_policy(self, policy_type, model=None):
+        if policy_type == "learned" and model is not None:
+            self.opponent_model = OpponentPolicy(model)
+            self.env_method("set_opponent_policy", "external")
+        else:
+            self.opponent_model = None
+            self.env_method("set_opponent_policy", policy_type, model)
+
+    def step_async(self, actions):
+        self.actions[:] = np.asarray(actions).reshape(self.actions.shape)
+        if self.opponent_model is not None:
+            self.opponent_actions[:] = flip_action(self.opponent_model.predict(self.opponent_obs))
+        for remote in self.remotes:
+            remote.send(("step", None))
+        self.waiting = True
+
+    def step_wait(self):
+        for remote in self.remotes:
+            remote.recv()
+        self.waiting = False
+
+        infos = [{} for _ in range(self.num_envs)]
+        for i in np.flatnonzero(self.dones):
+            infos[i]["winner"] = int(self.winners[i])
+            infos[i]["terminal_observation"] = self.terminal_obs[i].copy()
+
+        return self.obs.copy(), self.rewards.copy(), self.dones.copy(), infos
+
+    def seed(self, seed=None):
+        seeds = np.random.SeedSequence(seed).spawn(len(self.remotes))
+        for remote, worker_seed in zip(self.remotes, seeds):
+            remote.send(("seed", worker_seed))
+        for remote in self.remotes:
+            remote.recv()
+        # Workers get independent streams spawned from `seed`, report it per env as CTFVecEnv does
+        return [seed for _ in range(self.num_envs)]
+
+    def close(self):
+        if self.closed:
+            return
+        if self.waiting:
+            for remote in self.remotes:
+                remote.recv()
+        for remote in self.remotes:
+            remote.send(("close", None))
+        for process in self.processes:
+            process.join()
+        self.closed = True
+
+    def _worker_indices(self, indices):
+        """
+        Map global env indices to (worker, local indices) for the workers they live on.
+        """
+        indices = range(self.num_envs) if indices is None else [indices] if isinstance(indices, int) else indices
+        targets = []
+        for worker, (start, stop) in enumerate(self.slices):
+            local = [i - start for i in indices if start <= i < stop]
+            if local:
+                targets.append((worker, local))
+        return targets
+
+    def get_attr(self, attr_name, indices=None):
+        targets = self._worker_indices(indices)
+        for worker, local in targets:
+            self.remotes[worker].send(("get_attr", (attr_name, local)))
+        return [value for worker, _ in targets for value in self.remotes[worker].recv()]
+
+    def set_attr(self, attr_name, value, indices=None):
+        targets = self._worker_indices(indices)
+        # Each worker's envs share one CTFVecEnv, so only whole workers can be targeted
+        for worker, local in targets:
+            start, stop = self.slices[worker]
+            if sorted(local) != list(range(stop - start)):
+                raise ValueError(f"set_attr can only target whole workers, envs {start}-{stop - 1} share worker {worker}.")
+        for worker, local in targets:
+            self.remotes[worker].send(("set_attr", (attr_name, value, local)))
+        for worker, _ in targets:
+            self.remotes[worker].recv()
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        targets = self._worker_indices(indices)
+        for worker, local in targets:
+            self.remotes[worker].send(("env_method", (method_name, local, method_args, method_kwargs)))
+        return [value for worker, _ in targets for value in self.remotes[worker].recv()]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _, local in self._worker_indices(indices) for _ in local]
@@ -0,0 +1,119 @@
+import queue
+import shutil
+import subprocess
+import threading
+
+
+def _find_ffmpeg():
+    path = shutil.which("ffmpeg")
+    if path is None:
+        try:
+            import imageio_ffmpeg
+            path = imageio_ffmpeg.get_ffmpeg_exe()
+        except ImportError:
+            pass
+    return path
+
+
+class VideoWriter:
+    """
+    Streaming mp4 encoder.
+
+    write() hands a frame to a background thread and returns straight away; the
+    thread pipes raw RGB frames into ffmpeg (or an OpenCV VideoWriter if ffmpeg
+    is not installed), which encodes and writes them as they arrive. At most
+    `max_queued` frames are held in memory, so memory stays flat however long
+    the episode runs.
+    """
+
+    def __init__(self, path, fps=30, max_queued=64) -> None:
+        self.path = path
+        self.fps = fps
+        self.frames = queue.Queue(maxsize=max_queued)
+        self.error = None
+
+        # The encoder is opened on the first frame, once the resolution is known
+        self.thread = None
+        self.num_frames = 0
+
+    def _open_ffmpeg(self, ffmpeg, width, height):
+        cmd = [
+            ffmpeg, "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", str(self.fps), "-i", "-",
+            "-c:v", "libx264", "-pix_fmt", "yuv420p", self.path,
+        ]
+        process = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+
+        def write(frame):
+            process.stdin.write(frame.tobytes())
+
+        def close():
+            process.stdin.close()
+            if process.wait() != 0:
+                raise RuntimeError(f"ffmpeg exited with code {process.returncode} while writing {self.path}")
+
+        return write, close
+
+    def _open_cv2(self, width, height):
+        import cv2
+
+        writer = cv2.VideoWriter(self.path, cv2.VideoWriter_fourcc(*"mp4v"), self.fps, (width, height))
+
+        def write(frame):
+            writer.write(cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
+
+        return write, writer.release
+
+    def _encode(self, height, width):
+        # Set once close()'s None has been taken off the queue, nothing is queued after it
+        closed = False
+        try:
+            ffmpeg = _find_ffmpeg()
+            write, close = self._open_ffmpeg(ffmpeg, width, height) if ffmpeg else self._open_cv2(width, height)
+            try:
+                while True:
+                    frame = self.frames.get()
+                    if frame is None:
+                        closed = True
+                        break
+                    write(frame)
+            finally:
+                close()
+        except Exception as e:
+            self.error = e
+            # Keep draining so write() never blocks on a dead encoder
+            while not closed:
+                closed = self.frames.get() is None
+
+    def write(self, frame):
+        """
+        Queue an (H, W, 3) uint8 RGB frame. The frame is copied, so the caller
+        may reuse its buffer.
+        """
+        if self.error is not None:
+            raise self.error
+
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._encode, args=frame.shape[:2], daemon=True)
+            self.thread.start()
+
+        self.frames.put(frame.copy())
+        self.num_frames += 1
+
+    def close(self):
+        """
+        Flush the remaining frames and finish the file.
+        """
+        if self.thread is not None:
+            self.frames.put(None)
+            self.thread.join()
+            self.thread = None
+
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()